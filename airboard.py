@@ -1,17 +1,45 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 import cv2
 import sys
-from modules import HandTracker, VirtualKeyboard, DrawingCanvas, AIAssistant, SketchManager
+import threading
+from modules import VirtualKeyboard, DrawingCanvas, InfiniteCanvas, SketchManager, GestureEngine
+from modules import GestureStateMachine, HandTrackAssociator, palm_centers, gestures, gesture_state
+from modules import StrokeLogWriter, FramePool
+from modules.buffer_pool import blend_rect
+from settings import SettingsWatcher, RESTART_ONLY, changed_fields
 import config
 
 
 class AirBoard:
     def __init__(self):
+        self.startup_times = {'imports': time.perf_counter() - _IMPORT_START}
+        self._startup_start = time.perf_counter()
+
+        # Every full-frame scratch array of the render loop lives here
+        self.frame_pool = FramePool()
+
+        # Typed runtime settings; the file is watched and reapplied on change
+        self.settings_watcher = SettingsWatcher(config.SETTINGS_FILE,
+                                                interval=config.SETTINGS_POLL_SECONDS)
+        self.settings = self.settings_watcher.load()
+        perf = self.settings.performance
+
+        # MediaPipe is the slowest thing to load, so build and warm it up
+        # while the camera opens
+        tracker_result = {}
+        tracker_thread = threading.Thread(target=self._load_hand_tracker,
+                                          args=(tracker_result,), daemon=True)
+        tracker_thread.start()
+
+        t = time.perf_counter()
         self.cap = cv2.VideoCapture(config.CAMERA_INDEX)
         
         # Enhanced camera settings for consistent quality
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.CAMERA_WIDTH)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.CAMERA_HEIGHT)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)  # Set consistent frame rate
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, perf.camera_width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, perf.camera_height)
+        self.cap.set(cv2.CAP_PROP_FPS, perf.camera_fps)  # Set consistent frame rate
         self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer lag
         
         # Try to set these if your camera supports them
@@ -30,44 +58,319 @@ class AirBoard:
             print("Error: Could not read from camera")
             sys.exit(1)
 
+        # The board keeps this size even if a reload changes the camera resolution
         self.frame_h, self.frame_w = frame.shape[:2]
+        self.capture_shape = frame.shape
+        self.frame_index = 0
+        # Hands, track ids and fingertips from the last frame hand tracking ran on
+        self.last_hands = ([], [], [])
+        self.startup_times['camera'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        tracker_thread.join()
+        if 'error' in tracker_result:
+            raise tracker_result['error']
+        self.hand_tracker = tracker_result['tracker']
+        self.startup_times['hand_tracker (parallel)'] = tracker_result['time']
+        self.startup_times['hand_tracker wait'] = time.perf_counter() - t
 
         # Initialize modules
-        self.hand_tracker = HandTracker(
-            min_detection_confidence=config.MIN_DETECTION_CONFIDENCE,
-            min_tracking_confidence=config.MIN_TRACKING_CONFIDENCE,
+        t = time.perf_counter()
+        self.gesture_engine = GestureEngine(
+            pinch_threshold=config.PINCH_THRESHOLD,
             max_num_hands=config.MAX_NUM_HANDS
         )
-
-        self.drawing_canvas = DrawingCanvas(
-            self.frame_w,
-            self.frame_h,
-            color=(0, 165, 255),  # Orange-ish pen color
-            brush_size=config.DEFAULT_BRUSH_SIZE
+        self.hand_tracks = HandTrackAssociator(
+            max_distance=config.TRACK_MAX_DISTANCE,
+            max_missed_frames=config.TRACK_MAX_MISSED_FRAMES
         )
+        self.gesture_states = GestureStateMachine(
+            on_threshold=config.GESTURE_ON_THRESHOLD,
+            off_threshold=config.GESTURE_OFF_THRESHOLD,
+            min_down_frames=config.GESTURE_MIN_DOWN_FRAMES,
+            min_up_frames=config.GESTURE_MIN_UP_FRAMES,
+            min_dwell_frames=config.GESTURE_MIN_DWELL_FRAMES,
+            smoothing=config.GESTURE_SMOOTHING
+        )
+
+        # One color per hand only when several can be tracked; a single user
+        # keeps the default pen color however often the hand leaves the frame
+        palette = config.USER_COLORS if config.MAX_NUM_HANDS > 1 else None
+        if config.INFINITE_CANVAS:
+            self.drawing_canvas = InfiniteCanvas(
+                self.frame_w,
+                self.frame_h,
+                color=(0, 165, 255),  # Orange-ish pen color
+                brush_size=self.settings.drawing.brush_size,
+                palette=palette,
+                eraser_size=self.settings.drawing.eraser_size,
+                shape_snapping=self.settings.drawing.shape_snapping,
+                chunk_size=perf.chunk_size,
+                min_zoom=config.MIN_ZOOM,
+                max_zoom=config.MAX_ZOOM,
+                pool=self.frame_pool,
+                antialiasing=perf.antialias_ink,
+                mipmap_cache_size=perf.mipmap_cache_size
+            )
+        else:
+            self.drawing_canvas = DrawingCanvas(
+                self.frame_w,
+                self.frame_h,
+                color=(0, 165, 255),  # Orange-ish pen color
+                brush_size=self.settings.drawing.brush_size,
+                per_user_layers=config.PER_USER_LAYERS,
+                palette=palette,
+                eraser_size=self.settings.drawing.eraser_size,
+                shape_snapping=self.settings.drawing.shape_snapping,
+                tile_size=perf.canvas_tile_size,
+                fill_window=perf.fill_window,
+                pool=self.frame_pool,
+                antialiasing=perf.antialias_ink
+            )
+        # Last fingertip of each hand dragging the view (infinite canvas)
+        self.view_anchors = {}
 
         self.keyboard = VirtualKeyboard(
-            key_w=config.KEY_WIDTH,
-            key_h=config.KEY_HEIGHT,
-            key_margin=config.KEY_MARGIN,
-            hover_threshold=config.HOVER_THRESHOLD
+            key_w=self.settings.keyboard.key_width,
+            key_h=self.settings.keyboard.key_height,
+            key_margin=self.settings.keyboard.key_margin,
+            hover_threshold=self.settings.keyboard.hover_threshold,
+            pool=self.frame_pool,
+            antialiasing=perf.antialias_ui
         )
 
+        # Thumbnails that fit in the gallery strip along the bottom
+        self.gallery_spacing = 12
+        self.gallery_size = max(1, (self.frame_w - 20) //
+                                (config.THUMBNAIL_SIZE[0] + self.gallery_spacing))
         self.sketch_manager = SketchManager(
             save_dir=config.SKETCH_DIR,
-            thumbnail_size=config.THUMBNAIL_SIZE
+            thumbnail_size=config.THUMBNAIL_SIZE,
+            session_dir=config.SESSION_DIR,
+            background_load=config.BACKGROUND_GALLERY,
+            max_loaded=self.gallery_size
         )
 
-        # AI Assistant
+        # Record every finished stroke to a session stroke log
+        self.stroke_log = None
+        if config.RECORD_SESSIONS:
+            infinite = isinstance(self.drawing_canvas, InfiniteCanvas)
+            self.stroke_log = StrokeLogWriter(
+                self.sketch_manager.new_session_path(),
+                width=0 if infinite else self.frame_w,
+                height=0 if infinite else self.frame_h
+            )
+            self.drawing_canvas.stroke_listeners.append(self.stroke_log)
+
+        # Optional network viewers
+        self.board_server = None
+        if config.SHARE_BOARD:
+            from modules import BoardServer
+            try:
+                self.board_server = BoardServer(
+                    host=config.SHARE_HOST,
+                    port=config.SHARE_PORT,
+                    tile_size=perf.share_tile_size,
+                    queue_size=perf.share_queue_size
+                ).start()
+                print(f"Sharing board on {config.SHARE_HOST}:{config.SHARE_PORT}")
+            except OSError as e:
+                print(f"Board sharing disabled: {e}")
+
+        # AI Assistant, created on the first SEND
         self.ai_response = ""
-        self.ai = AIAssistant(
-            api_key=config.GEMINI_API_KEY,
-            model=config.AI_MODEL
-        )
+        self.ai = None
+        # Handwriting reader, created on first use of WRITE mode
+        self.handwriting = None
+        self.send_pending = False  # SEND waiting for handwriting to be recognized
 
         self.mode = "DRAW"
         self.show_help = True
 
+        # Gesture events drive the pen and the discrete actions
+        self.gesture_states.subscribe(gesture_state.PEN_DOWN, self.on_pen_down)
+        self.gesture_states.subscribe(gesture_state.MOVE, self.on_pen_move)
+        self.gesture_states.subscribe(gesture_state.PEN_UP, self.on_pen_up)
+        self.gesture_states.subscribe(gesture_state.GESTURE, self.on_gesture)
+        self.startup_times['modules'] = time.perf_counter() - t
+
+    def _load_hand_tracker(self, result):
+        """Import, build and warm up the hand tracker (runs on a helper thread)"""
+        t = time.perf_counter()
+        try:
+            from modules import HandTracker
+            tracker = HandTracker(
+                min_detection_confidence=config.MIN_DETECTION_CONFIDENCE,
+                min_tracking_confidence=config.MIN_TRACKING_CONFIDENCE,
+                max_num_hands=config.MAX_NUM_HANDS,
+                pool=self.frame_pool
+            )
+            perf = self.settings.performance
+            tracker.warm_up(perf.camera_width, perf.camera_height)
+            result['tracker'] = tracker
+        except Exception as e:
+            result['error'] = e
+        result['time'] = time.perf_counter() - t
+
+    def get_ai(self):
+        """Create the AI assistant on first use"""
+        if self.ai is None:
+            from modules import AIAssistant
+            self.ai = AIAssistant(
+                api_key=config.GEMINI_API_KEY,
+                model=self.settings.ai_model
+            )
+        return self.ai
+
+    def apply_settings(self, settings):
+        """Apply reloaded settings to the running subsystems, keeping the board"""
+        changed = changed_fields(self.settings, settings)
+        if not changed:
+            return
+        perf = settings.performance
+        if any(name.startswith('performance.camera_') for name in changed):
+            # Frames are scaled to the board size, so the canvas survives this
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, perf.camera_width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, perf.camera_height)
+            self.cap.set(cv2.CAP_PROP_FPS, perf.camera_fps)
+
+        canvas = self.drawing_canvas
+        canvas.set_brush_size(settings.drawing.brush_size)
+        canvas.set_eraser_size(settings.drawing.eraser_size)
+        canvas.shape_snapping = settings.drawing.shape_snapping
+        canvas.line_type = cv2.LINE_AA if perf.antialias_ink else cv2.LINE_8
+        if isinstance(canvas, InfiniteCanvas):
+            canvas.trim_mipmaps(perf.mipmap_cache_size)
+        else:
+            canvas.set_tile_size(perf.canvas_tile_size)
+            canvas.fill_window = perf.fill_window
+
+        self.keyboard.key_w = settings.keyboard.key_width
+        self.keyboard.key_h = settings.keyboard.key_height
+        self.keyboard.key_margin = settings.keyboard.key_margin
+        self.keyboard.hover_threshold = settings.keyboard.hover_threshold
+        self.keyboard.line_type = cv2.LINE_AA if perf.antialias_ui else cv2.LINE_8
+
+        if self.board_server:
+            self.board_server.tile_size = perf.share_tile_size
+            self.board_server.queue_size = perf.share_queue_size  # for new viewers
+        if self.ai:
+            self.ai.model = settings.ai_model
+
+        for name in RESTART_ONLY:
+            if name in changed:
+                print(f"Setting {name} takes effect after a restart")
+        self.settings = settings
+        print(f"Settings reloaded ({settings.preset}): {', '.join(changed)}")
+
+    def report_startup(self):
+        """Print how long each startup stage took"""
+        self.startup_times['first frame'] = time.perf_counter() - self._startup_start
+        total = time.perf_counter() - _IMPORT_START
+        print("Startup time breakdown:")
+        for stage, seconds in self.startup_times.items():
+            print(f"  {stage:<24}{seconds * 1000:8.1f} ms")
+        print(f"  {'total':<24}{total * 1000:8.1f} ms")
+
+    # === Gesture Event Handlers ===
+    # Each hand track id is its own pen on the canvas
+    def on_pen_down(self, event):
+        if self.mode == "DRAW":
+            self.drawing_canvas.pen_down(event['x'], event['y'], pen=event['hand'])
+        elif self.mode == "WRITE":
+            self.handwriting.pen_down(event['x'], event['y'], pen=event['hand'])
+
+    def on_pen_move(self, event):
+        if self.mode == "DRAW":
+            self.drawing_canvas.pen_move(event['x'], event['y'], pen=event['hand'])
+        elif self.mode == "WRITE":
+            self.handwriting.pen_move(event['x'], event['y'], pen=event['hand'])
+
+    def on_pen_up(self, event):
+        self.drawing_canvas.pen_up(pen=event['hand'])
+        if self.handwriting:
+            self.handwriting.pen_up(pen=event['hand'])
+
+    def on_gesture(self, event):
+        if event['gesture'] == gestures.MODE_SWITCH:
+            self.toggle_mode()
+        elif event['gesture'] == gestures.PINCH_CLICK and self.mode == "KEYBOARD":
+            action = self.keyboard.press_at(event['x'], event['y'], frame_w=self.frame_w,
+                                            panel_rect=self.keyboard_panel_rect())
+            self.handle_key_action(action)
+        elif self.mode == "WRITE":
+            if event['gesture'] == gestures.PINCH_CLICK:
+                self.handle_key_action("SEND")
+            elif event['gesture'] == gestures.ERASE:
+                self.handwriting.cancel()
+
+    def toggle_mode(self):
+        # DRAW -> KEYBOARD -> WRITE -> DRAW
+        modes = ["DRAW", "KEYBOARD", "WRITE"]
+        if self.mode == "WRITE":
+            # Recognize whatever was written before leaving
+            self.handwriting.submit()
+        self.mode = modes[(modes.index(self.mode) + 1) % len(modes)]
+        if self.mode == "WRITE":
+            self.get_handwriting()
+        self.gesture_states.lift_all()
+
+    def get_handwriting(self):
+        """Create the handwriting reader on first use"""
+        if self.handwriting is None:
+            from modules.handwriting import HandwritingReader, create_recognizer
+            self.handwriting = HandwritingReader(
+                recognizer=create_recognizer(config.HANDWRITING_RECOGNIZER),
+                on_text=self.keyboard.append_word,
+                size=config.HANDWRITING_SIZE,
+                idle_seconds=config.HANDWRITING_IDLE_SECONDS
+            )
+        return self.handwriting
+
+    def handle_view_gestures(self, track_ids, fingertip_points):
+        """Two-finger (SELECT) drag pans the infinite canvas; two hands zoom"""
+        if not isinstance(self.drawing_canvas, InfiniteCanvas) or self.mode != "DRAW":
+            self.view_anchors = {}
+            return
+        dragging = {t: p for t, p in zip(track_ids, fingertip_points)
+                    if self.gesture_states.gesture_of(t) == gestures.SELECT}
+        prev = self.view_anchors
+        if len(dragging) >= 2 and len(prev) >= 2:
+            (a, pa), (b, pb) = list(dragging.items())[:2]
+            if a in prev and b in prev:
+                dist = ((pa[0] - pb[0]) ** 2 + (pa[1] - pb[1]) ** 2) ** 0.5
+                prev_dist = ((prev[a][0] - prev[b][0]) ** 2 + (prev[a][1] - prev[b][1]) ** 2) ** 0.5
+                if prev_dist > 1:
+                    mid = ((pa[0] + pb[0]) / 2, (pa[1] + pb[1]) / 2)
+                    self.drawing_canvas.zoom_at(dist / prev_dist, *mid)
+        elif len(dragging) == 1:
+            t, (x, y) = next(iter(dragging.items()))
+            if t in prev and len(prev) == 1:
+                self.drawing_canvas.pan(x - prev[t][0], y - prev[t][1])
+        self.view_anchors = dragging
+
+    def keyboard_panel_rect(self):
+        kb_panel_x = 20
+        kb_panel_w = int(self.frame_w * 0.64)
+        kb_panel_y = self.keyboard.start_y - 50
+        kb_panel_h = 4 * (self.keyboard.key_h + self.keyboard.key_margin) + 70
+        return kb_panel_x, kb_panel_y, kb_panel_w, kb_panel_h
+
+    def handle_key_action(self, action):
+        if action == "SEND":
+            if self.mode == "WRITE":
+                # Recognize the strokes still on screen; sent once every word is in
+                self.handwriting.submit()
+                self.send_pending = True
+            else:
+                self.send_text()
+
+    def send_text(self):
+        text = self.keyboard.get_text().strip()
+        if text:
+            self.get_ai().query(text, lambda r: setattr(self, "ai_response", r))
+            self.keyboard.clear_text()
+
     # Helper: word wrap for AI text
     def format_ai_text(self, text, max_chars, max_lines=20):
         if not text:
@@ -150,12 +453,8 @@ class AirBoard:
         box_h = header_h + content_h + padding
         
         # Draw semi-transparent background
-        overlay = frame.copy()
-        cv2.rectangle(overlay, 
-                     (margin, top_margin), 
-                     (margin + max_width, top_margin + box_h), 
-                     (20, 20, 40), -1)
-        frame = cv2.addWeighted(overlay, 0.8, frame, 0.2, 0)
+        blend_rect(frame, (margin, top_margin), (margin + max_width, top_margin + box_h),
+                   (20, 20, 40), 0.8, self.frame_pool, 'ai_response')
         
         # Draw header with gradient
         for i in range(header_h):
@@ -207,11 +506,8 @@ class AirBoard:
         content_width = panel_w - 2 * padding
         
         # Draw semi-transparent background for the panel
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (panel_x, panel_y),
-                     (panel_x + panel_w, panel_y + panel_h),
-                     (32, 32, 64), -1)
-        frame = cv2.addWeighted(overlay, 0.15, frame, 0.85, 0)
+        blend_rect(frame, (panel_x, panel_y), (panel_x + panel_w, panel_y + panel_h),
+                   (32, 32, 64), 0.15, self.frame_pool, 'ai_panel')
 
         # Draw header with gradient
         header_h = 40
@@ -288,27 +584,33 @@ class AirBoard:
         cv2.putText(frame, f"Mode: {self.mode}", (20, 40),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.8, mode_color, 2)
 
-        if self.ai.is_busy():
+        if self.ai and self.ai.is_busy():
             cv2.putText(frame, "AI Processing...", (10, 70),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        elif self.handwriting and self.handwriting.is_busy():
+            cv2.putText(frame, "Reading handwriting...", (10, 70),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
 
         if self.show_help:
-            overlay = frame.copy()
-            panel_w, panel_h = 320, 140
-            panel_x = self.frame_w - panel_w - 10
-            panel_y = self.frame_h - panel_h - 10
-            cv2.rectangle(overlay, (panel_x, panel_y),
-                          (panel_x + panel_w, panel_y + panel_h), (0, 0, 0), -1)
-            frame = cv2.addWeighted(overlay, 0.15, frame, 0.85, 0)
-
             help_texts = [
-                "'M' - Switch Mode",
+                "'M' / Thumb+Pinky - Switch Mode",
+                "Write Mode: Pinch / Enter - Send",
+                "Open Palm - Erase",
+                "'F' - Fill at Fingertip",
+                f"'G' - Shape Snap ({'On' if self.drawing_canvas.shape_snapping else 'Off'})",
                 "'S' - Save Sketch",
                 "'C' - Clear Canvas",
+                "'X' - Clear Your Ink (per-user layers)",
                 "'R' - Reset AI",
                 "'H' - Toggle Help",
                 "'Q' - Quit"
             ]
+            panel_w, panel_h = 340, 30 + 22 * len(help_texts)
+            panel_x = self.frame_w - panel_w - 10
+            panel_y = self.frame_h - panel_h - 10
+            blend_rect(frame, (panel_x, panel_y), (panel_x + panel_w, panel_y + panel_h),
+                       (0, 0, 0), 0.15, self.frame_pool, 'help_panel')
+
             y = panel_y + 25
             for t in help_texts:
                 cv2.putText(frame, t, (panel_x + 10, y),
@@ -319,103 +621,176 @@ class AirBoard:
     # === Main Loop ===
     def run(self):
         print("AirBoard Started!")
+        first_frame = True
         while True:
-            success, frame = self.cap.read()
+            new_settings = self.settings_watcher.poll()
+            if new_settings:
+                self.apply_settings(new_settings)
+
+            # Capture and flip into pooled buffers instead of fresh arrays
+            capture = self.frame_pool.get('capture', self.capture_shape)
+            success, raw = self.cap.read(capture)
             if not success:
                 break
+            self.capture_shape = raw.shape
             
             # Flip frame immediately for consistent processing
-            frame = cv2.flip(frame, 1)
+            frame = cv2.flip(raw, 1, dst=self.frame_pool.like('frame', raw))
             
-            # Process hand tracking
-            frame = self.hand_tracker.find_hands(frame, draw=False)
-            hands = self.hand_tracker.get_all_landmarks()
-            fingertip_points = []
-
-            if hands:
-                for hand in hands:
-                    x, y = self.hand_tracker.get_index_finger_tip(hand, frame.shape)
-                    fingertip_points.append((x, y))
-                    if self.mode == "DRAW":
-                        if self.hand_tracker.is_index_only_up(hand):
-                            self.drawing_canvas.draw_line(x, y)
-                        else:
-                            self.drawing_canvas.reset_position()
-                    elif self.mode == "KEYBOARD":
-                        kb_panel_x = 20
-                        kb_panel_w = int(self.frame_w * 0.64)
-                        kb_panel_y = self.keyboard.start_y - 50
-                        kb_panel_h = 4 * (self.keyboard.key_h + self.keyboard.key_margin) + 70
-                        frame, action = self.keyboard.handle_hover(x, y, frame,
-                            panel_rect=(kb_panel_x, kb_panel_y, kb_panel_w, kb_panel_h))
-                        if action == "SEND":
-                            text = self.keyboard.get_text().strip()
-                            if text:
-                                self.ai.query(text, lambda r: setattr(self, "ai_response", r))
-                                self.keyboard.clear_text()
+            # Process hand tracking, on every Nth frame only if configured.
+            # Landmarks are normalized, so this runs on the capture as is.
+            interval = max(1, self.settings.performance.inference_interval)
+            inferred = self.frame_index % interval == 0
+            if inferred:
+                self.hand_tracker.find_hands(frame, draw=False)
+            self.frame_index += 1
+            if frame.shape[:2] != (self.frame_h, self.frame_w):
+                display = self.frame_pool.get('display', (self.frame_h, self.frame_w, 3))
+                frame = cv2.resize(frame, (self.frame_w, self.frame_h), dst=display)
+
+            if inferred:
+                hands = self.hand_tracker.get_landmark_array()
+                hand_gestures = self.gesture_engine.analyze(hands)['gestures']
+                fingertip_points = [self.hand_tracker.get_index_finger_tip(hand, frame.shape)
+                                    for hand in hands]
+
+                track_ids = self.hand_tracks.update(hands)
+
+                # Debounced pen and gesture events are emitted from here; the
+                # state machines only advance on frames with fresh landmarks
+                self.gesture_states.update(track_ids, hand_gestures,
+                                           self.hand_tracker.get_confidences(), fingertip_points)
+                for pen in list(self.drawing_canvas.pens):
+                    if pen is not None and pen not in self.hand_tracks.tracks:
+                        self.drawing_canvas.remove_pen(pen)
+
+                self.handle_view_gestures(track_ids, fingertip_points)
+                self.last_hands = (hands, track_ids, fingertip_points)
             else:
-                self.drawing_canvas.reset_position()
+                # Skipped frame: reuse the last result for hover, erasing and drawing the UI
+                hands, track_ids, fingertip_points = self.last_hands
+
+            # Open palm erases around the palm centre while held
+            eraser_points = []
+            if self.mode == "DRAW":
+                for track_id, (px, py) in zip(track_ids, palm_centers(hands)):
+                    if self.gesture_states.gesture_of(track_id) == gestures.ERASE:
+                        ex, ey = int(px * self.frame_w), int(py * self.frame_h)
+                        self.drawing_canvas.erase_line(ex, ey, pen=track_id)
+                        eraser_points.append((ex, ey))
+                    else:
+                        self.drawing_canvas.lift_eraser(track_id)
+
+            if self.mode == "KEYBOARD":
+                for track_id, (x, y) in zip(track_ids, fingertip_points):
+                    if self.gesture_states.gesture_of(track_id) == gestures.PINCH_CLICK:
+                        continue
+                    frame, action = self.keyboard.handle_hover(x, y, frame,
+                        panel_rect=self.keyboard_panel_rect())
+                    self.handle_key_action(action)
+
+            if self.mode == "WRITE":
+                # A pause after the last stroke sends the word for recognition
+                self.handwriting.update()
+            if self.handwriting:
+                # Checked before delivering, so no word can land after the check
+                idle = not self.handwriting.is_busy()
+                self.handwriting.deliver()
+                if self.send_pending and idle:
+                    self.send_pending = False
+                    self.send_text()
+
+            if self.board_server:
+                self.board_server.publish(self.drawing_canvas)
 
             # Mode-specific rendering
             if self.mode == "DRAW":
                 # Overlay the drawing canvas on the camera frame
                 frame = self.drawing_canvas.overlay_on_frame(frame)
-            else:
-                self.keyboard.key_w = 60
-                self.keyboard.key_h = 60
-                self.keyboard.key_margin = 10
-                kb_panel_x = 20
-                kb_panel_w = int(self.frame_w * 0.64)
-                kb_panel_y = self.keyboard.start_y - 50
-                kb_panel_h = 4 * (self.keyboard.key_h + self.keyboard.key_margin) + 70
+            elif self.mode == "KEYBOARD":
+                kb_panel_x, kb_panel_y, kb_panel_w, kb_panel_h = self.keyboard_panel_rect()
                 frame = self.keyboard.draw(frame, panel_rect=(kb_panel_x, kb_panel_y, kb_panel_w, kb_panel_h))
                 ai_panel_w = self.frame_w - (kb_panel_x + kb_panel_w) - 30
                 ai_panel_x = kb_panel_x + kb_panel_w + 10
                 ai_panel_y = self.keyboard.start_y - 50
                 ai_panel_h = kb_panel_h
                 frame = self.display_ai_side_panel(frame, ai_panel_x, ai_panel_y, ai_panel_w, ai_panel_h)
+            elif self.mode == "WRITE":
+                # Write anywhere; recognized words appear in the text bar
+                kb_panel_x, kb_panel_y, kb_panel_w, kb_panel_h = self.keyboard_panel_rect()
+                frame = self.keyboard.draw_text_bar(frame, kb_panel_x, kb_panel_w)
+                frame = self.handwriting.draw(frame)
+                ai_panel_w = self.frame_w - (kb_panel_x + kb_panel_w) - 30
+                ai_panel_x = kb_panel_x + kb_panel_w + 10
+                frame = self.display_ai_side_panel(frame, ai_panel_x, kb_panel_y, ai_panel_w, kb_panel_h)
 
             # Draw hand landmarks and fingertips
-            frame = self.hand_tracker.find_hands(frame, draw=True)
+            frame = self.hand_tracker.draw_landmarks(frame)
             for (fx, fy) in fingertip_points:
                 cv2.circle(frame, (fx, fy), 12, (255, 0, 255), -1)
                 cv2.circle(frame, (fx, fy), 15, (255, 255, 255), 2)
+            for (ex, ey) in eraser_points:
+                cv2.circle(frame, (ex, ey), self.drawing_canvas.eraser_size // 2, (255, 255, 255), 2)
 
             # Draw UI elements based on mode
             if self.mode == "DRAW":
                 # Show sketch gallery at the bottom
-                thumb_w, thumb_h = self.sketch_manager.thumbnail_size
-                spacing = 12
-                max_disp = max(1, (self.frame_w - 20) // (thumb_w + spacing))
+                thumb_h = self.sketch_manager.thumbnail_size[1]
                 gal_x = 10
                 gal_y = self.frame_h - thumb_h - 12
                 frame = self.sketch_manager.draw_gallery(
                     frame,
-                    max_display=int(max_disp),
+                    max_display=self.gallery_size,
                     x_offset=gal_x,
                     y_offset=gal_y,
                     orientation='horizontal',
-                    spacing=spacing
+                    spacing=self.gallery_spacing
                 )
             
             frame = self.draw_ui(frame)
 
             cv2.imshow("AirBoard - Touchless Whiteboard", frame)
+            if first_frame:
+                first_frame = False
+                if config.STARTUP_REPORT:
+                    self.report_startup()
             key = cv2.waitKey(1) & 0xFF
             if key == ord('q'):
                 break
             elif key == ord('m'):
-                self.mode = "KEYBOARD" if self.mode == "DRAW" else "DRAW"
+                self.toggle_mode()
             elif key == ord('c'):
                 self.drawing_canvas.clear()
                 self.keyboard.clear_text()
+                self.send_pending = False
+                if self.handwriting:
+                    self.handwriting.cancel()
+            elif key == ord('x') and self.mode == "DRAW" and track_ids:
+                # Clear only the ink of the user whose hand is in view
+                if getattr(self.drawing_canvas, 'per_user_layers', False):
+                    self.drawing_canvas.clear_pen(track_ids[0])
+            elif key == 13 and self.mode == "WRITE":  # Enter
+                self.handle_key_action("SEND")
             elif key == ord('s') and self.mode == "DRAW":
                 self.sketch_manager.save_sketch(self.drawing_canvas.get_canvas())
+            elif key == ord('f') and self.mode == "DRAW" and fingertip_points:
+                fx, fy = fingertip_points[0]
+                self.drawing_canvas.fill(fx, fy, pen=track_ids[0])
+            elif key == ord('v') and isinstance(self.drawing_canvas, InfiniteCanvas):
+                self.drawing_canvas.reset_view()
+            elif key == ord('g'):
+                self.drawing_canvas.shape_snapping = not self.drawing_canvas.shape_snapping
             elif key == ord('r'):
                 self.ai_response = ""
             elif key == ord('h'):
                 self.show_help = not self.show_help
 
+        if self.stroke_log:
+            self.stroke_log.close()
+        if self.board_server:
+            self.board_server.stop()
+        if self.handwriting:
+            self.handwriting.close()
         self.cap.release()
         cv2.destroyAllWindows()
 
@@ -8,30 +8,82 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 
 # AI Settings
-AI_MODEL = os.getenv('AI_MODEL', 'gemini-1.5-flash')
+AI_MODEL = os.getenv('AI_MODEL', 'gemini-2.0-flash')
 AI_MAX_RESPONSE_LINES = 5
 
 # Camera Settings
 CAMERA_WIDTH = 1280
 CAMERA_HEIGHT = 720
 CAMERA_INDEX = 0
+CAMERA_FPS = 30
+INFERENCE_INTERVAL = 1   # Run hand tracking on every Nth frame
 
 # Hand Detection Settings
 MIN_DETECTION_CONFIDENCE = 0.7
 MIN_TRACKING_CONFIDENCE = 0.7
-MAX_NUM_HANDS = 1
+MAX_NUM_HANDS = 1  # Raise for collaborative boards; each hand gets its own pen
+
+# Multi-user Settings
+TRACK_MAX_DISTANCE = 0.15     # Max palm movement per frame (normalized) to keep a hand's id
+TRACK_MAX_MISSED_FRAMES = 5   # Frames a hand may vanish before its id is dropped
+PER_USER_LAYERS = False       # Keep a separate canvas layer per hand
+USER_COLORS = [(0, 165, 255), (255, 128, 0), (0, 200, 0), (200, 0, 200)]  # BGR pen colors per hand
 
 # Drawing Settings
 DEFAULT_BRUSH_SIZE = 5
 DEFAULT_COLOR = (0, 255, 0)  # Yellow (BGR)
 PINCH_THRESHOLD = 0.05
+ERASER_SIZE = 40         # Open palm eraser diameter in pixels
+SHAPE_SNAPPING = False   # Snap near-lines, rectangles and circles when a stroke ends
+CANVAS_TILE_SIZE = 64    # Tile size for stroke backups
+ANTIALIAS_INK = False    # Anti-aliased pen strokes and shapes
+ANTIALIAS_UI = True      # Anti-aliased keyboard and text
+FILL_WINDOW = 256        # Initial flood fill window in pixels
+
+# Infinite Canvas Settings
+INFINITE_CANVAS = False  # Pannable/zoomable board instead of a screen-sized one
+CHUNK_SIZE = 256         # Side of each lazily allocated canvas chunk
+MIN_ZOOM = 0.125
+MAX_ZOOM = 4.0
+MIPMAP_CACHE_SIZE = 256  # Downsampled chunks kept for zoomed-out views
+
+# Gesture Debouncing
+GESTURE_ON_THRESHOLD = 0.6    # Smoothed DRAW score needed to put the pen down
+GESTURE_OFF_THRESHOLD = 0.3   # Smoothed DRAW score below which the pen lifts
+GESTURE_MIN_DOWN_FRAMES = 2
+GESTURE_MIN_UP_FRAMES = 3
+GESTURE_MIN_DWELL_FRAMES = 3  # Frames a gesture must hold before it fires
+GESTURE_SMOOTHING = 0.5       # EMA factor for the DRAW score
+
+# Handwriting Settings
+HANDWRITING_RECOGNIZER = os.getenv('HANDWRITING_RECOGNIZER', 'tesseract')
+HANDWRITING_SIZE = (256, 64)     # Word image (w, h) the strokes are rasterized into
+HANDWRITING_IDLE_SECONDS = 1.0   # Pen-up time that ends a word
 
 # Keyboard Settings
-KEY_WIDTH = 80
-KEY_HEIGHT = 80
+KEY_WIDTH = 60
+KEY_HEIGHT = 60
 KEY_MARGIN = 10
 HOVER_THRESHOLD = 1  # seconds
 
+# Board Sharing Settings
+SHARE_BOARD = os.getenv('SHARE_BOARD', '0') == '1'  # Stream the canvas to network viewers
+SHARE_HOST = os.getenv('SHARE_HOST', '127.0.0.1')
+SHARE_PORT = int(os.getenv('SHARE_PORT', '8765'))
+SHARE_TILE_SIZE = 64
+SHARE_QUEUE_SIZE = 16   # Messages buffered per viewer before it is resynced
+
 # Sketch Settings
 SKETCH_DIR = os.getenv('SKETCH_DIR', 'sketches')
-THUMBNAIL_SIZE = (100, 75)
\ No newline at end of file
+THUMBNAIL_SIZE = (100, 75)
+SESSION_DIR = os.getenv('SESSION_DIR', os.path.join(SKETCH_DIR, 'sessions'))
+RECORD_SESSIONS = True  # Append every stroke to a compact .absl stroke log
+
+# Startup Settings
+STARTUP_REPORT = True   # Print a startup-time breakdown once the first frame is shown
+BACKGROUND_GALLERY = True  # Load saved sketch thumbnails after the first frame
+
+# Runtime Settings
+PRESET = os.getenv('AIRBOARD_PRESET', 'balanced')  # low-power, balanced or high-quality
+SETTINGS_FILE = os.getenv('AIRBOARD_SETTINGS', 'airboard_settings.json')  # Reloaded when it changes
+SETTINGS_POLL_SECONDS = 1.0
@@ -1,17 +1,40 @@
 """
 AirBoard Modules
+
+Exports are resolved lazily on first access, so importing the package does
+not pull in MediaPipe or google.genai until a module that needs them is used.
 """
 
-from .hand_tracker import HandTracker
-from .keyboard import VirtualKeyboard
-from .drawing import DrawingCanvas
-from .ai_assistant import AIAssistant
-from .sketch_manager import SketchManager
+import importlib
+
+_EXPORTS = {
+    'HandTracker': '.hand_tracker',
+    'VirtualKeyboard': '.keyboard',
+    'DrawingCanvas': '.drawing',
+    'InfiniteCanvas': '.infinite_canvas',
+    'AIAssistant': '.ai_assistant',
+    'SketchManager': '.sketch_manager',
+    'GestureEngine': '.gestures',
+    'RuleClassifier': '.gestures',
+    'GestureStateMachine': '.gesture_state',
+    'GestureEvents': '.gesture_state',
+    'HandTrackAssociator': '.tracking',
+    'palm_centers': '.tracking',
+    'recognize_shape': '.shapes',
+    'StrokeLogWriter': '.stroke_log',
+    'StrokeLog': '.stroke_log',
+    'export_sessions': '.stroke_log',
+    'BoardServer': '.board_server',
+    'FramePool': '.buffer_pool'
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    'HandTracker',
-    'VirtualKeyboard',
-    'DrawingCanvas',
-    'AIAssistant',
-    'SketchManager'
-]
\ No newline at end of file
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # cache, so __getattr__ runs once per name
+    return value
@@ -1,22 +1,29 @@
 from dotenv import load_dotenv
 import os
 import threading
-from google.genai import Client
 
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
 
 
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+
 class AIAssistant:
-    def __init__(self, api_key=None, model="gemini-2.0-flash"):
+    def __init__(self, api_key=None, model=None):
         if api_key:
             os.environ["GEMINI_API_KEY"] = api_key
         else:
             api_key = os.getenv("GEMINI_API_KEY", "")
-        self.model = model
+        # Same fallback as config.AI_MODEL, so both agree without arguments
+        self.model = model or os.getenv("AI_MODEL", DEFAULT_MODEL)
         self.response = ""
         self.is_processing = False
-        self.client = Client(api_key=api_key) if api_key else None
+        self.client = None
+        if api_key:
+            # Imported here: google.genai is slow to import and only needed with a key
+            from google.genai import Client
+            self.client = Client(api_key=api_key)
 
     def query(self, text, callback=None):
         if not self.client:
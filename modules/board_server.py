@@ -0,0 +1,326 @@
+"""
+Local network board sharing.
+
+BoardServer streams the canvas to any number of TCP viewers. A viewer gets a
+keyframe (the full board) when it connects, then only the tiles that changed.
+Tiles published while the loop is busy are merged, newest pixels winning, so
+a slow encoder never builds a backlog. Every update is PNG-encoded once and
+the same bytes are queued to all viewers. A viewer whose queue fills up is not waited for: its backlog is
+replaced by a single keyframe, which is also encoded once per board version.
+
+Wire format: every message is a '<I' length prefix followed by
+    '<BIHHH'  kind (1 keyframe, 2 delta), sequence, board width, height, tile count
+    per tile '<HHHHI' x, y, w, h, PNG byte length, then the PNG (BGRA)
+
+Run a viewer with:  python -m modules.board_server --host 127.0.0.1 --port 8765
+"""
+
+import argparse
+import asyncio
+import struct
+import threading
+
+import cv2
+import numpy as np
+
+KEYFRAME = 1
+DELTA = 2
+MESSAGE_HEADER = struct.Struct('<BIHHH')
+TILE_HEADER = struct.Struct('<HHHHI')
+LENGTH = struct.Struct('<I')
+
+
+def encode_message(kind, seq, width, height, tiles, compression=3):
+    """Encode [(x, y, pixels), ...] into one length-prefixed message"""
+    parts = [MESSAGE_HEADER.pack(kind, seq, width, height, len(tiles))]
+    for x, y, pixels in tiles:
+        ok, png = cv2.imencode('.png', pixels, [cv2.IMWRITE_PNG_COMPRESSION, compression])
+        if not ok:
+            continue
+        h, w = pixels.shape[:2]
+        parts.append(TILE_HEADER.pack(x, y, w, h, len(png)))
+        parts.append(png.tobytes())
+    body = b''.join(parts)
+    return LENGTH.pack(len(body)) + body
+
+
+def decode_message(body):
+    """Inverse of encode_message (without the length prefix)"""
+    kind, seq, width, height, count = MESSAGE_HEADER.unpack_from(body, 0)
+    off = MESSAGE_HEADER.size
+    tiles = []
+    for _ in range(count):
+        x, y, w, h, size = TILE_HEADER.unpack_from(body, off)
+        off += TILE_HEADER.size
+        png = np.frombuffer(body, dtype=np.uint8, count=size, offset=off)
+        off += size
+        tiles.append((x, y, cv2.imdecode(png, cv2.IMREAD_UNCHANGED)))
+    return kind, seq, width, height, tiles
+
+
+class _Viewer:
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.needs_keyframe = True
+
+
+class BoardServer:
+    """Streams a DrawingCanvas (or InfiniteCanvas viewport) to TCP viewers.
+
+    The asyncio loop runs in a background thread. The main loop only calls
+    publish(canvas) once per frame, which copies the dirty tiles and hands
+    them over; all encoding and socket work happens off the render thread.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, tile_size=64, queue_size=16,
+                 keyframe_ratio=0.5):
+        self.host = host
+        self.port = port
+        self.tile_size = tile_size
+        self.queue_size = queue_size
+        # Updates covering more than this fraction of the board go out as keyframes
+        self.keyframe_ratio = keyframe_ratio
+
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.viewers = set()
+        self._ready = threading.Event()
+        self._error = None
+        self._published = False
+
+        # Tiles published but not yet broadcast, merged by position
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_size = None
+        self._wakeup = None
+
+        # Server-side mirror of the board, only touched on the loop thread
+        self.board = None
+        self.seq = 0
+        self._keyframe = None
+        self._keyframe_seq = -1
+
+    # === Main Thread API ===
+    def start(self):
+        """Start serving; raises OSError if the address cannot be bound"""
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        if not self._ready.wait(timeout=5):
+            raise OSError(f"Board server on {self.host}:{self.port} did not start")
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def stop(self):
+        """Close the server and every viewer, then end the loop thread"""
+        if self.loop and self.loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+            try:
+                future.result(timeout=2)
+            except Exception as e:
+                print(f"Error stopping board server: {e}")
+                self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def viewer_count(self):
+        return len(self.viewers)
+
+    def publish(self, canvas):
+        """Send the canvas regions changed since the last call"""
+        rect = canvas.pop_dirty_rect()
+        if self.loop is None:
+            return
+        if getattr(canvas, 'view_dirty', False):
+            canvas.render_view()
+        pixels = canvas.canvas
+        height, width = pixels.shape[:2]
+        if not self._published:
+            # The first publish sends the whole board
+            rect = (0, 0, width, height)
+            self._published = True
+        if rect is None:
+            return
+
+        ts = self.tile_size
+        x0, y0, x1, y1 = rect
+        tiles = []
+        for ty in range(y0 // ts, (y1 - 1) // ts + 1):
+            for tx in range(x0 // ts, (x1 - 1) // ts + 1):
+                x, y = tx * ts, ty * ts
+                # Small copies; the canvas keeps changing on this thread
+                tiles.append((x, y, pixels[y:y + ts, x:x + ts].copy()))
+        with self._lock:
+            if self._pending_size != (width, height):
+                # Tiles of a board with another size are useless now
+                self._pending = {}
+                self._pending_size = (width, height)
+            # Only wake the loop for the first update since its last pass
+            wake = not self._pending
+            for x, y, tile in tiles:
+                self._pending[(x, y)] = tile
+        if wake:
+            self.loop.call_soon_threadsafe(self._wakeup.set)
+
+    # === Loop Thread ===
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._wakeup = asyncio.Event()
+            self.server = loop.run_until_complete(
+                asyncio.start_server(self._handle_viewer, self.host, self.port))
+        except OSError as e:
+            # Reported by start(); publish() stays a no-op without a loop
+            self._error = e
+            loop.close()
+            self._ready.set()
+            return
+        self.loop = loop
+        loop.create_task(self._broadcast())
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+    async def _shutdown(self):
+        """Stop accepting viewers, cancel the broadcast and viewer tasks, then stop"""
+        self.server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.stop()
+
+    def _apply(self, width, height, tiles):
+        if self.board is None or self.board.shape[:2] != (height, width):
+            self.board = np.zeros((height, width, 4), dtype=np.uint8)
+        for x, y, pixels in tiles:
+            h, w = pixels.shape[:2]
+            self.board[y:y + h, x:x + w] = pixels
+        self.seq += 1
+
+    async def _get_keyframe(self):
+        """Full board message, encoded at most once per board version"""
+        if self._keyframe_seq != self.seq:
+            h, w = self.board.shape[:2]
+            self._keyframe = await self.loop.run_in_executor(
+                None, encode_message, KEYFRAME, self.seq, w, h, [(0, 0, self.board.copy())])
+            self._keyframe_seq = self.seq
+        return self._keyframe
+
+    async def _broadcast(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                size = self._pending_size
+            if not pending:
+                continue
+            width, height = size
+            tiles = [(x, y, pixels) for (x, y), pixels in pending.items()]
+            resized = self.board is None or self.board.shape[:2] != (height, width)
+            self._apply(width, height, tiles)
+            if not self.viewers:
+                continue
+
+            area = sum(p.shape[0] * p.shape[1] for _, _, p in tiles)
+            if resized or area >= self.keyframe_ratio * width * height:
+                message = await self._get_keyframe()
+                for viewer in self.viewers:
+                    viewer.needs_keyframe = True
+            else:
+                message = await self.loop.run_in_executor(
+                    None, encode_message, DELTA, self.seq, width, height, tiles)
+
+            for viewer in list(self.viewers):
+                if viewer.needs_keyframe or viewer.queue.full():
+                    # New or slow viewer: replace its backlog with one keyframe
+                    self._drain(viewer)
+                    viewer.queue.put_nowait(await self._get_keyframe())
+                    viewer.needs_keyframe = False
+                else:
+                    viewer.queue.put_nowait(message)
+
+    @staticmethod
+    def _drain(viewer):
+        while not viewer.queue.empty():
+            viewer.queue.get_nowait()
+
+    @staticmethod
+    async def _wait_closed(reader):
+        """Discard anything a viewer sends; returns when it disconnects"""
+        while await reader.read(1024):
+            pass
+
+    async def _handle_viewer(self, reader, writer):
+        viewer = _Viewer(writer, self.queue_size)
+        self.viewers.add(viewer)
+        closed = None
+        try:
+            if self.board is not None:
+                keyframe = await self._get_keyframe()
+                # _broadcast may have sent this viewer one while it was encoding
+                if viewer.needs_keyframe:
+                    self._drain(viewer)
+                    viewer.queue.put_nowait(keyframe)
+                    viewer.needs_keyframe = False
+            closed = self.loop.create_task(self._wait_closed(reader))
+            while True:
+                next_message = self.loop.create_task(viewer.queue.get())
+                done, _ = await asyncio.wait({next_message, closed},
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if closed in done:
+                    next_message.cancel()
+                    break
+                writer.write(next_message.result())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.viewers.discard(viewer)
+            if closed is not None:
+                closed.cancel()
+            writer.close()
+
+
+# === Viewer ===
+
+async def view(host='127.0.0.1', port=8765, window="AirBoard - Shared Board"):
+    """Connect to a BoardServer and show the board in an OpenCV window"""
+    reader, writer = await asyncio.open_connection(host, port)
+    board = None
+    try:
+        while True:
+            length = LENGTH.unpack(await reader.readexactly(LENGTH.size))[0]
+            kind, _, width, height, tiles = decode_message(await reader.readexactly(length))
+            if board is None or board.shape[:2] != (height, width):
+                board = np.zeros((height, width, 4), dtype=np.uint8)
+            for x, y, pixels in tiles:
+                h, w = pixels.shape[:2]
+                board[y:y + h, x:x + w] = pixels
+            cv2.imshow(window, board[:, :, :3])
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    except asyncio.IncompleteReadError:
+        print("Board server closed the connection")
+    finally:
+        writer.close()
+        cv2.destroyAllWindows()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="View a shared AirBoard")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(view(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
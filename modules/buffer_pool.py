@@ -0,0 +1,71 @@
+"""
+Reusable frame-sized buffers.
+
+Every stage of the render path asks the pool for a named buffer and passes
+it to OpenCV as dst=, so once the first frame has been drawn the loop stops
+allocating full-size arrays. A buffer is only reallocated when the requested
+shape or dtype changes (e.g. a different camera resolution).
+"""
+
+import cv2
+import numpy as np
+
+
+class FramePool:
+    """Named, preallocated arrays shared by one AirBoard session"""
+
+    def __init__(self):
+        self.buffers = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        """Buffer for name with the given shape; contents are undefined"""
+        shape = tuple(shape)
+        buf = self.buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self.buffers[name] = buf
+        return buf
+
+    def like(self, name, array):
+        """Buffer with the same shape and dtype as array"""
+        return self.get(name, array.shape, array.dtype)
+
+    def nbytes(self):
+        return sum(buf.nbytes for buf in self.buffers.values())
+
+    def clear(self):
+        self.buffers.clear()
+
+
+def blend_rect(frame, pt1, pt2, color, alpha, pool, name='blend_rect', line_type=cv2.LINE_8):
+    """Draw a filled rectangle over frame with the given opacity, in place.
+
+    Same result as blending a full-frame copy with addWeighted, but only the
+    rectangle's region is copied and blended, into a pooled buffer.
+    """
+    h, w = frame.shape[:2]
+    x0, y0 = max(min(pt1[0], pt2[0]), 0), max(min(pt1[1], pt2[1]), 0)
+    x1, y1 = min(max(pt1[0], pt2[0]) + 2, w), min(max(pt1[1], pt2[1]) + 2, h)
+    if x0 >= x1 or y0 >= y1:
+        return frame
+    roi = frame[y0:y1, x0:x1]
+    overlay = pool.like(name, roi)
+    np.copyto(overlay, roi)
+    cv2.rectangle(overlay, (pt1[0] - x0, pt1[1] - y0), (pt2[0] - x0, pt2[1] - y0),
+                  color, -1, line_type)
+    cv2.addWeighted(overlay, alpha, roi, 1 - alpha, 0, dst=roi)
+    return frame
+
+
+def blend_canvas(frame, canvas, pool, name='canvas'):
+    """Alpha-blend a BGRA canvas over a BGR frame into a pooled buffer"""
+    bgr = pool.get(name + '_bgr', frame.shape)
+    weight = pool.get(name + '_alpha', frame.shape[:2], np.float32)
+    inverse = pool.get(name + '_inverse', frame.shape[:2], np.float32)
+    out = pool.like(name + '_out', frame)
+    cv2.cvtColor(canvas, cv2.COLOR_BGRA2BGR, dst=bgr)
+    np.multiply(canvas[:, :, 3], np.float32(1 / 255.0), out=weight)
+    np.subtract(np.float32(1), weight, out=inverse)
+    # out = frame * (1 - alpha) + canvas * alpha
+    cv2.blendLinear(frame, bgr, inverse, weight, dst=out)
+    return out
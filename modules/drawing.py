@@ -1,67 +1,508 @@
 import cv2
 import numpy as np
 
+from .buffer_pool import FramePool, blend_canvas
+from .shapes import recognize_shape, shape_bounds, shape_points
+
+
+def _shift(point, origin):
+    return (point[0] - origin[0], point[1] - origin[1])
+
+
+def _save_pixels(saved, owned, pixels, local, hits):
+    """Copy the hit pixels not owned yet into saved, then mark them owned"""
+    new = hits & ~owned[local]
+    np.copyto(saved[local], pixels[local], where=new[:, :, None])
+    owned[local] |= hits
+
+
+def palette_slot(pens, palette):
+    """Lowest palette slot no live pen uses; the least shared one if all are taken"""
+    used = [state['slot'] for state in pens.values() if state['slot'] is not None]
+    return min(range(len(palette)), key=lambda slot: (used.count(slot), slot))
+
+
 class DrawingCanvas:
-    def __init__(self, width, height, color=(0, 255, 0), brush_size=5):
+    def __init__(self, width, height, color=(0, 255, 0), brush_size=5,
+                 per_user_layers=False, palette=None, eraser_size=40,
+                 shape_snapping=False, tile_size=64, fill_window=256, pool=None,
+                 antialiasing=False):
         self.width = width
         self.height = height
-        # Use 4 channels (BGRA) for proper transparency
+        # Use 4 channels (BGRA) for proper transparency.
+        # This is the composite of every pen, and the only array blended per frame.
         self.canvas = np.zeros((height, width, 4), dtype=np.uint8)
         self.color = color  # BGR format
         self.brush_size = brush_size
-        self.prev_x = None
-        self.prev_y = None
-    
-    def draw_line(self, x, y):
+        self.eraser_size = eraser_size
+        # Line type for ink; the eraser always uses hard edges
+        self.line_type = cv2.LINE_AA if antialiasing else cv2.LINE_8
+
+        # Pen state per pen id (hand track id); None is the default pen
+        self.pens = {}
+        self.palette = palette or []
+        # Optional BGRA layers, so one user's ink can be cleared alone. They are
+        # keyed by palette slot, not track id: a hand that leaves and comes
+        # back gets a new id but the freed slot (and its color) again, and
+        # the number of layers stays bounded.
+        self.per_user_layers = per_user_layers
+        self.layers = {}
+
+        # Snap finished strokes to lines/rectangles/circles. Tiles touched by
+        # the stroke are backed up so the freehand ink can be replaced.
+        self.shape_snapping = shape_snapping
+        self.tile_size = tile_size
+        # Initial flood fill window; doubles while the fill leaks out of it
+        self.fill_window = fill_window
+
+        # Union of regions changed since the last pop_dirty_rect()
+        self.dirty_rect = None
+
+        # Called with a stroke dict ('tool', 'color', 'size', 'points') whenever
+        # a stroke, fill or clear is finished, e.g. by a StrokeLogWriter
+        self.stroke_listeners = []
+
+        # Scratch buffers for overlay_on_frame
+        self.pool = pool or FramePool()
+
+    def get_pen(self, pen=None):
+        """Return the state dict for a pen id, creating it on first use"""
+        state = self.pens.get(pen)
+        if state is None:
+            color = slot = None
+            if pen is not None and self.palette:
+                slot = palette_slot(self.pens, self.palette)
+                color = self.palette[slot]
+            state = self.pens[pen] = {
+                'prev': None, 'color': color, 'slot': slot, 'points': None,
+                'backup': None, 'erase_prev': None, 'erase_points': None
+            }
+        return state
+
+    def pen_color(self, pen=None):
+        state = self.pens.get(pen)
+        return (state and state['color']) or self.color
+
+    # Backwards compatible accessors for the default pen
+    @property
+    def prev_x(self):
+        prev = self.get_pen()['prev']
+        return prev[0] if prev else None
+
+    @property
+    def prev_y(self):
+        prev = self.get_pen()['prev']
+        return prev[1] if prev else None
+
+    def _emit_stroke(self, tool, points, size=0, pen=None):
+        if not self.stroke_listeners:
+            return
+        stroke = {'tool': tool, 'color': self.pen_color(pen), 'size': size, 'points': points}
+        for listener in self.stroke_listeners:
+            listener(stroke)
+
+    # === Dirty Region Tracking ===
+    def _clip_rect(self, x0, y0, x1, y1):
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.width, x1), min(self.height, y1)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0, y0, x1, y1
+
+    def _segment_rect(self, p0, p1, size):
+        r = size // 2 + 1
+        return self._clip_rect(min(p0[0], p1[0]) - r, min(p0[1], p1[1]) - r,
+                               max(p0[0], p1[0]) + r + 1, max(p0[1], p1[1]) + r + 1)
+
+    def _mark_dirty(self, rect):
+        if rect is None:
+            return
+        if self.dirty_rect is not None:
+            dx0, dy0, dx1, dy1 = self.dirty_rect
+            rect = (min(rect[0], dx0), min(rect[1], dy0), max(rect[2], dx1), max(rect[3], dy1))
+        self.dirty_rect = rect
+
+    def pop_dirty_rect(self):
+        """Return the (x0, y0, x1, y1) region changed since the last call, or None"""
+        rect, self.dirty_rect = self.dirty_rect, None
+        return rect
+
+    # === Pen Strokes ===
+    def draw_line(self, x, y, pen=None):
         """Draw line from previous position to current"""
-        if self.prev_x is not None and self.prev_y is not None:
-            # Draw with full opacity (alpha = 255)
-            cv2.line(self.canvas, (self.prev_x, self.prev_y), 
-                    (x, y), (*self.color, 255), self.brush_size)
-        self.prev_x, self.prev_y = x, y
-    
-    def reset_position(self):
+        state = self.get_pen(pen)
+        if state['prev'] is not None:
+            p0, p1 = state['prev'], (x, y)
+            rect = self._segment_rect(p0, p1, self.brush_size)
+            if rect is not None:
+                def draw(target, origin, color):
+                    cv2.line(target, _shift(p0, origin), _shift(p1, origin), color,
+                             self.brush_size, self.line_type)
+                if self._snapping_strokes():
+                    self._track_ink(pen, rect, self._ink_mask(rect, draw))
+                # Draw with full opacity (alpha = 255); OpenCV only writes the
+                # pixels the line covers, so this stays inside rect
+                color = (*self.pen_color(pen), 255)
+                draw(self.canvas, (0, 0), color)
+                if self.per_user_layers:
+                    layer = self._get_layer(pen)
+                    draw(layer['pixels'], (0, 0), color)
+                    self._grow_bbox(layer, rect)
+                self._mark_dirty(rect)
+        if state['points'] is not None:
+            state['points'].append((x, y))
+        state['prev'] = (x, y)
+
+    def pen_down(self, x, y, pen=None):
+        """Start a new stroke at (x, y)"""
+        state = self.get_pen(pen)
+        state['prev'] = (x, y)
+        state['points'] = [(x, y)]
+        state['backup'] = {} if self.shape_snapping else None
+
+    def pen_move(self, x, y, pen=None):
+        """Extend the current stroke to (x, y)"""
+        self.draw_line(x, y, pen)
+
+    def pen_up(self, pen=None):
+        """Finish the current stroke, snapping it to a shape if enabled.
+
+        Returns the recognized shape tuple, or None.
+        """
+        state = self.pens.get(pen)
+        if state is None:
+            return None
+        shape = None
+        if self.shape_snapping and state['points'] and state['backup'] is not None:
+            shape = recognize_shape(state['points'])
+            if shape is not None:
+                self._restore_tiles(state, pen)
+                state['backup'] = None
+                self.draw_shape(shape, pen)
+        if shape is not None:
+            self._emit_stroke(shape[0], shape_points(shape), self.brush_size, pen)
+        elif state['points']:
+            self._emit_stroke('pen', state['points'], self.brush_size, pen)
+        state['points'] = None
+        state['backup'] = None
+        self.reset_position(pen)
+        return shape
+
+    def reset_position(self, pen=None):
         """Reset drawing position (lift pen)"""
-        self.prev_x, self.prev_y = None, None
-    
+        state = self.pens.get(pen)
+        if state is not None:
+            state['prev'] = None
+
+    def reset_all(self):
+        """Lift every pen"""
+        for state in self.pens.values():
+            state['prev'] = None
+            state['erase_prev'] = None
+            state['erase_points'] = None
+            state['points'] = None
+            state['backup'] = None
+
+    def remove_pen(self, pen):
+        """Forget a pen whose hand track has ended, freeing its palette slot.
+
+        Its ink stays in the slot's layer, which the next new pen takes over.
+        """
+        self.pens.pop(pen, None)
+
+    # === Shape Snapping ===
+    def set_tile_size(self, tile_size):
+        """Change the backup tile size; strokes in progress are left unsnapped"""
+        if tile_size == self.tile_size:
+            return
+        self.tile_size = tile_size
+        for state in self.pens.values():
+            state['backup'] = None
+
+    def _tile_slices(self, rect):
+        ts = self.tile_size
+        x0, y0, x1, y1 = rect
+        for ty in range(y0 // ts, (y1 - 1) // ts + 1):
+            for tx in range(x0 // ts, (x1 - 1) // ts + 1):
+                yield (tx, ty), (slice(ty * ts, (ty + 1) * ts), slice(tx * ts, (tx + 1) * ts))
+
+    def _snapping_strokes(self):
+        return any(state['backup'] is not None for state in self.pens.values())
+
+    def _ink_mask(self, rect, draw):
+        """Pixels inside rect that draw(target, origin, color) covers"""
+        x0, y0, x1, y1 = rect
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        draw(mask, (x0, y0), 255)
+        return mask > 0
+
+    def _tile_views(self, rect):
+        """(key, tile slices, slices into rect, slices into tile) for tiles meeting rect"""
+        x0, y0, x1, y1 = rect
+        for key, (sy, sx) in self._tile_slices(rect):
+            iy0, iy1 = max(y0, sy.start), min(y1, sy.stop)
+            ix0, ix1 = max(x0, sx.start), min(x1, sx.stop)
+            yield (key, (sy, sx),
+                   (slice(iy0 - y0, iy1 - y0), slice(ix0 - x0, ix1 - x0)),
+                   (slice(iy0 - sy.start, iy1 - sy.start), slice(ix0 - sx.start, ix1 - sx.start)))
+
+    def _track_ink(self, pen, rect, ink, erase=False):
+        """Update the snapping backups before pen paints (or erases) the ink mask.
+
+        A stroke only owns the pixels it covered itself: its own backup saves
+        them before the first change, and any other stroke in progress gives
+        up the pixels painted over, so snapping never restores over ink (or
+        erased areas) that belong to someone else.
+        """
+        key = self.layer_key(pen)
+        for other, state in self.pens.items():
+            if state['backup'] is None:
+                continue
+            if other == pen and not erase:
+                self._backup_tiles(state, pen, rect, ink)
+            else:
+                same_layer = erase or self.layer_key(other) == key
+                for tile, _, roi, local in self._tile_views(rect):
+                    entry = state['backup'].get(tile)
+                    if entry is None:
+                        continue
+                    entry['mask'][local] &= ~ink[roi]
+                    if same_layer and entry['layer_mask'] is not None:
+                        entry['layer_mask'][local] &= ~ink[roi]
+
+    def _backup_tiles(self, state, pen, rect, ink):
+        """Save the pixels the current stroke is about to cover for the first time"""
+        backup = state['backup']
+        layer = self._get_layer(pen) if self.per_user_layers else None
+        for key, sl, roi, local in self._tile_views(rect):
+            hits = ink[roi]
+            entry = backup.get(key)
+            if entry is None:
+                if not hits.any():
+                    continue
+                shape = self.canvas[sl].shape
+                entry = backup[key] = {
+                    'canvas': np.zeros(shape, dtype=np.uint8),
+                    'mask': np.zeros(shape[:2], dtype=bool),
+                    'layer': np.zeros(shape, dtype=np.uint8) if layer else None,
+                    'layer_mask': np.zeros(shape[:2], dtype=bool) if layer else None
+                }
+            _save_pixels(entry['canvas'], entry['mask'], self.canvas[sl], local, hits)
+            if layer is not None and entry['layer'] is not None:
+                _save_pixels(entry['layer'], entry['layer_mask'], layer['pixels'][sl], local, hits)
+
+    def _restore_tiles(self, state, pen):
+        """Undo the current stroke by restoring the pixels it still owns"""
+        layer = self.layers.get(self.layer_key(pen)) if self.per_user_layers else None
+        ts = self.tile_size
+        for (tx, ty), entry in state['backup'].items():
+            sl = (slice(ty * ts, (ty + 1) * ts), slice(tx * ts, (tx + 1) * ts))
+            np.copyto(self.canvas[sl], entry['canvas'], where=entry['mask'][:, :, None])
+            if layer is not None and entry['layer'] is not None:
+                np.copyto(layer['pixels'][sl], entry['layer'],
+                          where=entry['layer_mask'][:, :, None])
+            self._mark_dirty(self._clip_rect(tx * ts, ty * ts, (tx + 1) * ts, (ty + 1) * ts))
+
+    def draw_shape(self, shape, pen=None):
+        """Draw a recognized shape tuple with the pen's color and brush size"""
+        rect = self._clip_rect(*shape_bounds(shape, self.brush_size))
+        if rect is None:
+            return
+        kind, a, b = shape
+
+        def draw(target, origin, color):
+            pa = _shift(a, origin)
+            if kind == 'circle':
+                cv2.circle(target, pa, b, color, self.brush_size, self.line_type)
+            elif kind == 'line':
+                cv2.line(target, pa, _shift(b, origin), color, self.brush_size, self.line_type)
+            elif kind == 'rect':
+                cv2.rectangle(target, pa, _shift(b, origin), color, self.brush_size,
+                              self.line_type)
+        if self._snapping_strokes():
+            self._track_ink(pen, rect, self._ink_mask(rect, draw))
+        color = (*self.pen_color(pen), 255)
+        draw(self.canvas, (0, 0), color)
+        if self.per_user_layers:
+            layer = self._get_layer(pen)
+            draw(layer['pixels'], (0, 0), color)
+            self._grow_bbox(layer, rect)
+        self._mark_dirty(rect)
+
+    # === Eraser ===
+    def erase_line(self, x, y, pen=None):
+        """Clear alpha along the eraser path from this pen's last eraser point"""
+        state = self.get_pen(pen)
+        prev = state['erase_prev'] or (x, y)
+        rect = self._segment_rect(prev, (x, y), self.eraser_size)
+        if rect is not None:
+            x0, y0, x1, y1 = rect
+            p0 = (prev[0] - x0, prev[1] - y0)
+            p1 = (x - x0, y - y0)
+            if self._snapping_strokes():
+                ink = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+                cv2.line(ink, p0, p1, 255, self.eraser_size)
+                self._track_ink(pen, rect, ink > 0, erase=True)
+            # Erase on every layer, since the eraser works on the whole board
+            targets = [self.canvas] + [layer['pixels'] for layer in self.layers.values()]
+            for target in targets:
+                cv2.line(target[y0:y1, x0:x1], p0, p1, (0, 0, 0, 0), self.eraser_size)
+            self._mark_dirty(rect)
+        if state['erase_points'] is None:
+            state['erase_points'] = []
+        state['erase_points'].append((x, y))
+        state['erase_prev'] = (x, y)
+
+    def lift_eraser(self, pen=None):
+        state = self.pens.get(pen)
+        if state is None:
+            return
+        if state['erase_points']:
+            self._emit_stroke('eraser', state['erase_points'], self.eraser_size, pen)
+        state['erase_prev'] = None
+        state['erase_points'] = None
+
+    def set_eraser_size(self, size):
+        self.eraser_size = max(1, size)
+
+    # === Flood Fill ===
+    def fill(self, x, y, pen=None):
+        """Flood fill the region under (x, y) with the pen's color.
+
+        The fill runs on a window around the seed that doubles only while the
+        filled region touches its edge, so closed shapes never cost a
+        full-canvas pass. Returns True if anything was filled.
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        half = self.fill_window // 2
+        while True:
+            x0, y0, x1, y1 = self._clip_rect(x - half, y - half, x + half + 1, y + half + 1)
+            alpha = np.ascontiguousarray(self.canvas[y0:y1, x0:x1, 3])
+            mask = np.zeros((y1 - y0 + 2, x1 - x0 + 2), dtype=np.uint8)
+            cv2.floodFill(alpha, mask, (x - x0, y - y0), 0, 0, 0,
+                          4 | cv2.FLOODFILL_MASK_ONLY | (255 << 8))
+            region = mask[1:-1, 1:-1]
+            leaks = ((x0 > 0 and region[:, 0].any()) or (y0 > 0 and region[0].any()) or
+                     (x1 < self.width and region[:, -1].any()) or
+                     (y1 < self.height and region[-1].any()))
+            if not leaks:
+                break
+            half *= 2
+
+        filled = region > 0
+        if not filled.any():
+            return False
+        rect = (x0, y0, x1, y1)
+        if self._snapping_strokes():
+            self._track_ink(pen, rect, filled)
+        color = (*self.pen_color(pen), 255)
+        self.canvas[y0:y1, x0:x1][filled] = color
+        if self.per_user_layers:
+            layer = self._get_layer(pen)
+            layer['pixels'][y0:y1, x0:x1][filled] = color
+            self._grow_bbox(layer, rect)
+        self._mark_dirty(rect)
+        self._emit_stroke('fill', [(x, y)], pen=pen)
+        return True
+
+    # === Layers ===
+    def layer_key(self, pen):
+        """Layer a pen draws into: its palette slot (None for the default pen)"""
+        state = self.pens.get(pen)
+        return state['slot'] if state else None
+
+    def _get_layer(self, pen):
+        key = self.layer_key(pen)
+        # Popped and reinserted, so the dict stays ordered by most recent paint
+        layer = self.layers.pop(key, None)
+        if layer is None:
+            layer = {
+                'pixels': np.zeros((self.height, self.width, 4), dtype=np.uint8),
+                'bbox': None
+            }
+        self.layers[key] = layer
+        return layer
+
+    def _grow_bbox(self, layer, rect):
+        if layer['bbox'] is not None:
+            bx0, by0, bx1, by1 = layer['bbox']
+            rect = (min(rect[0], bx0), min(rect[1], by0), max(rect[2], bx1), max(rect[3], by1))
+        layer['bbox'] = rect
+
+    def _recompose(self, removed, x0, y0, x1, y1):
+        """Take a removed layer's ink out of the composite inside one ROI.
+
+        Only pixels where that ink is what shows are rebuilt, so everywhere
+        else the stacking order stays as painted. The rebuilt pixels stack
+        the remaining layers by their most recent paint, which can differ
+        from the per-pixel order where two of them overlap there.
+        """
+        if x1 <= x0 or y1 <= y0:
+            return
+        dst = self.canvas[y0:y1, x0:x1]
+        gone = removed['pixels'][y0:y1, x0:x1]
+        stale = (gone[:, :, 3] > 0) & (dst == gone).all(axis=2)
+        dst[stale] = 0
+        for layer in self.layers.values():
+            src = layer['pixels'][y0:y1, x0:x1]
+            np.copyto(dst, src, where=(stale & (src[:, :, 3] > 0))[:, :, None])
+        self._mark_dirty((x0, y0, x1, y1))
+
+    def clear_pen(self, pen):
+        """Clear only the ink of one pen's user, i.e. its palette slot (needs per_user_layers)"""
+        if pen not in self.pens:
+            return
+        # Recomposing can change pixels under strokes in progress; leave them unsnapped
+        for state in self.pens.values():
+            state['backup'] = None
+        layer = self.layers.pop(self.layer_key(pen), None)
+        if layer is None or layer['bbox'] is None:
+            return
+        self._recompose(layer, *layer['bbox'])
+
     def clear(self):
         """Clear entire canvas"""
-        self.canvas = np.zeros((self.height, self.width, 4), dtype=np.uint8)
-        self.reset_position()
-    
+        # In place, so nothing holding a view of the canvas goes stale
+        self.canvas[:] = 0
+        self.layers = {}
+        self.reset_all()
+        self._mark_dirty((0, 0, self.width, self.height))
+        self._emit_stroke('clear', [])
+
     def get_canvas(self):
         """Get current canvas (3-channel version for saving)"""
         # Convert BGRA to BGR for saving
         return self.canvas[:, :, :3].copy()
-    
-    def set_color(self, color):
-        """Change drawing color (BGR format)"""
-        self.color = color
-    
+
+    def get_layer(self, pen):
+        """BGR copy of the layer a pen draws into, or None"""
+        layer = self.layers.get(self.layer_key(pen)) if pen in self.pens else None
+        return layer['pixels'][:, :, :3].copy() if layer else None
+
+    def set_color(self, color, pen=None):
+        """Change drawing color (BGR format), for one pen or the default"""
+        if pen is None:
+            self.color = color
+        else:
+            self.get_pen(pen)['color'] = color
+
     def set_brush_size(self, size):
         """Change brush size"""
         self.brush_size = max(1, size)
-    
+
     def overlay_on_frame(self, frame):
         """
         Overlay ONLY the drawn lines on frame without darkening.
         This preserves the original camera quality.
+        All pens and layers are already merged into self.canvas, so this is
+        a single blend no matter how many users are drawing.
         """
         # Check if canvas is empty (optimization)
         if np.max(self.canvas[:, :, 3]) == 0:
             return frame
-        
-        # Get alpha channel (where drawings exist)
-        alpha = self.canvas[:, :, 3] / 255.0
-        
-        # Expand alpha to 3 channels for vectorized operation
-        alpha_3ch = np.stack([alpha, alpha, alpha], axis=2)
-        
-        # Get BGR channels from canvas
-        canvas_bgr = self.canvas[:, :, :3]
-        
+
         # Blend: output = frame * (1 - alpha) + canvas * alpha
-        # This only affects pixels where alpha > 0 (where you drew)
-        blended = (frame * (1 - alpha_3ch) + canvas_bgr * alpha_3ch).astype(np.uint8)
-        
-        return blended
\ No newline at end of file
+        # This only affects pixels where alpha > 0 (where you drew).
+        # The result is a pooled buffer that is reused on the next call.
+        return blend_canvas(frame, self.canvas, self.pool)
@@ -0,0 +1,161 @@
+from . import gestures
+
+# Event types
+PEN_DOWN = "pen_down"
+MOVE = "move"
+PEN_UP = "pen_up"
+GESTURE = "gesture"
+
+
+class GestureEvents:
+    """Minimal publish/subscribe hub for gesture events.
+
+    Callbacks receive a single event dict with at least 'type' and 'hand'.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+
+    def subscribe(self, event_type, callback):
+        self._subscribers.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, event_type, callback):
+        callbacks = self._subscribers.get(event_type, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def emit(self, event_type, **payload):
+        callbacks = self._subscribers.get(event_type)
+        if not callbacks:
+            return
+        event = {'type': event_type, **payload}
+        for callback in list(callbacks):
+            callback(event)
+
+
+class HandGestureState:
+    """Debounced pen and gesture state for a single hand.
+
+    The pen goes down once the confidence-weighted DRAW score has stayed above
+    on_threshold for min_down_frames, and lifts once it has stayed below
+    off_threshold for min_up_frames. Between the two thresholds the pen keeps
+    its current state, so a single noisy frame cannot break a stroke.
+    While the hand is not drawing (a lift may be coming), moves are held back:
+    they are dropped if the lift is confirmed and replayed once DRAW returns,
+    so no trailing ink is drawn.
+    """
+
+    def __init__(self, hand_id, events, on_threshold=0.6, off_threshold=0.3,
+                 min_down_frames=2, min_up_frames=3, min_dwell_frames=3, smoothing=0.5):
+        self.hand_id = hand_id
+        self.events = events
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.min_down_frames = min_down_frames
+        self.min_up_frames = min_up_frames
+        self.min_dwell_frames = min_dwell_frames
+        self.smoothing = smoothing
+
+        self.score = 0.0
+        self.pen_is_down = False
+        self._pending = 0
+        self._held_moves = []  # positions seen while a lift is pending
+        self.gesture = gestures.NONE
+        self._candidate = gestures.NONE
+        self._candidate_frames = 0
+        self.position = None
+        self.missed_frames = 0
+
+    def update(self, gesture, confidence, x, y):
+        self.position = (x, y)
+        self.missed_frames = 0
+        self._update_gesture(gesture)
+
+        sample = confidence if gesture == gestures.DRAW else 0.0
+        self.score += self.smoothing * (sample - self.score)
+
+        if not self.pen_is_down:
+            self._pending = self._pending + 1 if self.score >= self.on_threshold else 0
+            if self._pending >= self.min_down_frames:
+                self.pen_is_down = True
+                self._pending = 0
+                self.events.emit(PEN_DOWN, hand=self.hand_id, x=x, y=y)
+        elif self.score <= self.off_threshold or gesture != gestures.DRAW:
+            self._pending = self._pending + 1 if self.score <= self.off_threshold else 0
+            if self._pending >= self.min_up_frames:
+                self.lift()
+            else:
+                self._held_moves.append((x, y))
+        else:
+            self._pending = 0
+            for hx, hy in self._held_moves:
+                self.events.emit(MOVE, hand=self.hand_id, x=hx, y=hy)
+            self._held_moves = []
+            self.events.emit(MOVE, hand=self.hand_id, x=x, y=y)
+
+    def _update_gesture(self, gesture):
+        if gesture == self._candidate:
+            self._candidate_frames += 1
+        else:
+            self._candidate = gesture
+            self._candidate_frames = 1
+        if self._candidate_frames >= self.min_dwell_frames and self._candidate != self.gesture:
+            previous, self.gesture = self.gesture, self._candidate
+            x, y = self.position
+            self.events.emit(GESTURE, hand=self.hand_id, gesture=self.gesture,
+                             previous=previous, x=x, y=y)
+
+    def lift(self):
+        """Force the pen up, e.g. when the hand leaves the frame"""
+        self._pending = 0
+        self._held_moves = []
+        self.score = 0.0
+        if self.pen_is_down:
+            self.pen_is_down = False
+            self.events.emit(PEN_UP, hand=self.hand_id)
+
+
+class GestureStateMachine:
+    """Keeps one HandGestureState per hand and routes their events"""
+
+    def __init__(self, **params):
+        self.params = params
+        self.events = GestureEvents()
+        self.hands = {}
+
+    def subscribe(self, event_type, callback):
+        self.events.subscribe(event_type, callback)
+
+    def unsubscribe(self, event_type, callback):
+        self.events.unsubscribe(event_type, callback)
+
+    def update(self, hand_ids, hand_gestures, confidences, points):
+        """Advance every visible hand by one frame.
+
+        A hand that drops out is kept for min_up_frames frames before its pen
+        is lifted, so a single missed detection does not end the stroke.
+        """
+        seen = set()
+        for hand_id, gesture, confidence, (x, y) in zip(hand_ids, hand_gestures, confidences, points):
+            state = self.hands.get(hand_id)
+            if state is None:
+                state = self.hands[hand_id] = HandGestureState(hand_id, self.events, **self.params)
+            state.update(gesture, float(confidence), x, y)
+            seen.add(hand_id)
+
+        for hand_id in list(self.hands):
+            if hand_id in seen:
+                continue
+            state = self.hands[hand_id]
+            state.missed_frames += 1
+            if state.missed_frames >= state.min_up_frames:
+                self.hands.pop(hand_id).lift()
+
+    def gesture_of(self, hand_id):
+        state = self.hands.get(hand_id)
+        return state.gesture if state else gestures.NONE
+
+    def lift_all(self):
+        """Lift every pen, e.g. on a mode change"""
+        for state in self.hands.values():
+            state.lift()
@@ -0,0 +1,130 @@
+import numpy as np
+
+# MediaPipe hand landmark indices
+WRIST = 0
+THUMB_TIP = 4
+INDEX_TIP = 8
+
+# Per finger (thumb, index, middle, ring, pinky)
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])
+FINGER_PIPS = np.array([3, 6, 10, 14, 18])  # thumb uses its IP joint
+FINGER_MCPS = np.array([2, 5, 9, 13, 17])
+
+# Gesture names
+NONE = "NONE"
+DRAW = "DRAW"
+ERASE = "ERASE"
+SELECT = "SELECT"
+PINCH_CLICK = "PINCH_CLICK"
+MODE_SWITCH = "MODE_SWITCH"
+
+# Finger pattern -> gesture, as (thumb, index, middle, ring, pinky).
+# None means "don't care" for that finger.
+DEFAULT_RULES = [
+    ((None, True, False, False, False), DRAW),
+    ((None, True, True, False, False), SELECT),
+    ((True, True, True, True, True), ERASE),
+    ((True, False, False, False, True), MODE_SWITCH),
+]
+
+_FINGER_BITS = np.array([1, 2, 4, 8, 16], dtype=np.int32)
+
+
+def finger_states(landmarks, out=None):
+    """Return (N, 5) bool array of extended fingers for (N, 21, 3) landmarks.
+
+    A finger counts as extended when its tip is farther from the wrist than
+    its PIP joint, which works for any hand rotation. The thumb is measured
+    against the index MCP instead, since it folds across the palm.
+    """
+    wrist = landmarks[:, WRIST:WRIST + 1, :2]
+    tips = landmarks[:, FINGER_TIPS, :2]
+    pips = landmarks[:, FINGER_PIPS, :2]
+
+    tip_d = np.sum((tips - wrist) ** 2, axis=2)
+    pip_d = np.sum((pips - wrist) ** 2, axis=2)
+    if out is None:
+        out = np.empty(tip_d.shape, dtype=bool)
+    np.greater(tip_d, pip_d, out=out)
+
+    index_mcp = landmarks[:, FINGER_MCPS[1], :2]
+    thumb_tip_d = np.sum((landmarks[:, THUMB_TIP, :2] - index_mcp) ** 2, axis=1)
+    thumb_ip_d = np.sum((landmarks[:, FINGER_PIPS[0], :2] - index_mcp) ** 2, axis=1)
+    out[:, 0] = thumb_tip_d > thumb_ip_d
+    return out
+
+
+def pinch_distance(landmarks):
+    """Thumb tip to index tip distance in normalized image units, shape (N,)"""
+    d = landmarks[:, THUMB_TIP, :2] - landmarks[:, INDEX_TIP, :2]
+    return np.sqrt(np.sum(d * d, axis=1))
+
+
+def palm_normal(landmarks):
+    """Unit palm normal per hand, shape (N, 3).
+
+    The sign of the z component tells whether the palm or the back of the
+    hand faces the camera (it flips between left and right hands).
+    """
+    wrist = landmarks[:, WRIST]
+    n = np.cross(landmarks[:, FINGER_MCPS[1]] - wrist,
+                 landmarks[:, FINGER_MCPS[4]] - wrist)
+    norm = np.sqrt(np.sum(n * n, axis=1, keepdims=True))
+    return n / np.maximum(norm, 1e-9)
+
+
+class RuleClassifier:
+    """Table-driven gesture classifier.
+
+    Finger patterns are expanded once into a 32-entry lookup table indexed by
+    the 5-bit finger state code, so classifying any number of hands is a
+    single vectorized gather. A pinch overrides the table.
+    """
+
+    def __init__(self, rules=None, pinch_threshold=0.05):
+        self.pinch_threshold = pinch_threshold
+        self.names = [NONE, PINCH_CLICK]
+        self.table = np.zeros(32, dtype=np.int32)
+        for pattern, gesture in (rules if rules is not None else DEFAULT_RULES):
+            self.add_rule(pattern, gesture)
+
+    def add_rule(self, pattern, gesture):
+        """Map a finger pattern (None = don't care) to a gesture name"""
+        if gesture not in self.names:
+            self.names.append(gesture)
+        gid = self.names.index(gesture)
+        for code in range(32):
+            bits = [(code >> i) & 1 for i in range(5)]
+            if all(p is None or bool(p) == bool(b) for p, b in zip(pattern, bits)):
+                # Earlier rules win
+                if self.table[code] == 0:
+                    self.table[code] = gid
+
+    def classify(self, features):
+        codes = features['fingers'].astype(np.int32) @ _FINGER_BITS
+        ids = np.where(features['pinch'] < self.pinch_threshold,
+                       1, self.table[codes])
+        return [self.names[i] for i in ids]
+
+
+class GestureEngine:
+    def __init__(self, classifier=None, pinch_threshold=0.05, max_num_hands=1):
+        self.classifier = classifier or RuleClassifier(pinch_threshold=pinch_threshold)
+        self._fingers = np.zeros((max_num_hands, 5), dtype=bool)
+
+    def set_classifier(self, classifier):
+        """Swap in any object with a classify(features) -> list of names method"""
+        self.classifier = classifier
+
+    def analyze(self, landmarks):
+        """Compute features and gestures for a (N, 21, 3) landmark array"""
+        n = len(landmarks)
+        if n > len(self._fingers):
+            self._fingers = np.zeros((n, 5), dtype=bool)
+        features = {
+            'fingers': finger_states(landmarks, out=self._fingers[:n]),
+            'pinch': pinch_distance(landmarks),
+            'palm_normal': palm_normal(landmarks),
+        }
+        features['gestures'] = self.classifier.classify(features) if n else []
+        return features
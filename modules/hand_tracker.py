@@ -2,8 +2,12 @@ import cv2
 import mediapipe as mp
 import numpy as np
 
+from .buffer_pool import FramePool
+from .gestures import FINGER_TIPS, FINGER_PIPS
+
 class HandTracker:
-    def __init__(self, min_detection_confidence=0.7, min_tracking_confidence=0.7, max_num_hands=1):
+    def __init__(self, min_detection_confidence=0.7, min_tracking_confidence=0.7, max_num_hands=1, pool=None):
+        self.pool = pool or FramePool()
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
             min_detection_confidence=min_detection_confidence,
@@ -13,40 +17,72 @@ class HandTracker:
         self.mp_draw = mp.solutions.drawing_utils
         self.results = None
 
+        # Landmarks of every detected hand, refreshed once per processed frame
+        self.landmarks = np.zeros((max_num_hands, 21, 3), dtype=np.float32)
+        self.scores = np.zeros(max_num_hands, dtype=np.float32)
+        self.num_hands = 0
+
+    def warm_up(self, width=640, height=480):
+        """Run one inference on a blank frame so the first real frame is not slow"""
+        self.hands.process(np.zeros((height, width, 3), dtype=np.uint8))
+        self.results = None
+
     def find_hands(self, frame, draw=True):
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.pool.like('rgb', frame))
         self.results = self.hands.process(rgb)
+        self._update_landmarks()
 
-        if self.results.multi_hand_landmarks and draw:
+        if draw:
+            self.draw_landmarks(frame)
+
+        return frame
+
+    def draw_landmarks(self, frame):
+        """Draw the last detection without running inference again"""
+        if self.results and self.results.multi_hand_landmarks:
             for handLms in self.results.multi_hand_landmarks:
                 self.mp_draw.draw_landmarks(frame, handLms, self.mp_hands.HAND_CONNECTIONS)
-
         return frame
 
-    def get_finger_position(self, handLms, tip_id, frame_shape):
-        h, w, c = frame_shape
-        lm = handLms.landmark[tip_id]
-        return int(lm.x * w), int(lm.y * h)
+    def _update_landmarks(self):
+        """Copy MediaPipe detections into the preallocated landmark array"""
+        hands = self.results.multi_hand_landmarks if self.results else None
+        self.num_hands = 0
+        if not hands:
+            return
+        if len(hands) > len(self.landmarks):
+            self.landmarks = np.zeros((len(hands), 21, 3), dtype=np.float32)
+            self.scores = np.zeros(len(hands), dtype=np.float32)
+        handedness = self.results.multi_handedness or []
+        for i, handLms in enumerate(hands):
+            self.landmarks[i] = [(lm.x, lm.y, lm.z) for lm in handLms.landmark]
+            self.scores[i] = handedness[i].classification[0].score if i < len(handedness) else 1.0
+        self.num_hands = len(hands)
+
+    def get_landmark_array(self):
+        """(num_hands, 21, 3) view of normalized landmarks for this frame"""
+        return self.landmarks[:self.num_hands]
+
+    def get_confidences(self):
+        """Per-hand detection confidence matching get_landmark_array()"""
+        return self.scores[:self.num_hands]
+
+    def get_finger_position(self, hand, tip_id, frame_shape):
+        h, w = frame_shape[:2]
+        return int(hand[tip_id, 0] * w), int(hand[tip_id, 1] * h)
 
     # ✅ INDEX TIP (ID = 8)
-    def get_index_finger_tip(self, handLms, frame_shape):
-        return self.get_finger_position(handLms, 8, frame_shape)
+    def get_index_finger_tip(self, hand, frame_shape):
+        return self.get_finger_position(hand, 8, frame_shape)
 
     # ✅ ✅ THUMB TIP (ID = 4) — REQUIRED
-    def get_thumb_finger_tip(self, handLms, frame_shape):
-        return self.get_finger_position(handLms, 4, frame_shape)
+    def get_thumb_finger_tip(self, hand, frame_shape):
+        return self.get_finger_position(hand, 4, frame_shape)
 
     # ✅ Detect if ONLY index finger up
-    def is_index_only_up(self, handLms):
-        tips = [8, 12, 16, 20]
-        pips = [6, 10, 14, 18]
-
-        index_up = handLms.landmark[tips[0]].y < handLms.landmark[pips[0]].y
-        others_down = all(
-            handLms.landmark[tips[i]].y > handLms.landmark[pips[i]].y for i in range(1, 4)
-        )
-
-        return index_up and others_down
+    def is_index_only_up(self, hand):
+        up = hand[FINGER_TIPS[1:], 1] < hand[FINGER_PIPS[1:], 1]
+        return bool(up[0] and not up[1:].any())
 
     def get_all_landmarks(self):
         if self.results and self.results.multi_hand_landmarks:
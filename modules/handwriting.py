@@ -0,0 +1,188 @@
+"""
+Air handwriting to text.
+
+HandwritingReader takes pen strokes with the same pen_down / pen_move /
+pen_up calls as DrawingCanvas. When the pen has been lifted for a moment the
+strokes of that word are rasterized on their own: only the points' bounding
+box is drawn, scaled into a small fixed-size image, so no camera frame or
+full canvas is ever processed. Recognition runs on a worker thread; the text
+is queued and handed to a callback when the main loop calls deliver().
+
+Recognizers are pluggable: anything with recognize(image) -> str works.
+The bundled TesseractRecognizer runs offline but needs the optional
+pytesseract package and the tesseract binary.
+"""
+
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+def rasterize_strokes(strokes, size=(256, 64), thickness=3, margin=6):
+    """Draw strokes (lists of (x, y)) scaled into a size=(w, h) grayscale image.
+
+    The strokes' bounding box is fitted into the image keeping its aspect
+    ratio; ink is black on white, which is what OCR engines expect.
+    """
+    width, height = size
+    image = np.full((height, width), 255, dtype=np.uint8)
+    strokes = [np.asarray(s, dtype=np.float32).reshape(-1, 2) for s in strokes if len(s)]
+    if not strokes:
+        return image
+    points = np.concatenate(strokes)
+    lo = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - lo, 1)
+    scale = min((width - 2 * margin) / extent[0], (height - 2 * margin) / extent[1])
+    # Center the scaled box in the image
+    offset = (np.array([width, height]) - extent * scale) / 2
+    for stroke in strokes:
+        pts = np.round((stroke - lo) * scale + offset).astype(np.int32)
+        if len(pts) == 1:
+            cv2.circle(image, tuple(pts[0]), thickness, 0, -1)
+        else:
+            cv2.polylines(image, [pts], False, 0, thickness, cv2.LINE_AA)
+    return image
+
+
+class TesseractRecognizer:
+    """Offline recognizer backed by pytesseract, reading one line of text"""
+
+    def __init__(self, config='--psm 7'):
+        # Imported here so the app runs without the optional dependency
+        import pytesseract
+        self.pytesseract = pytesseract
+        self.config = config
+
+    def recognize(self, image):
+        return self.pytesseract.image_to_string(image, config=self.config).strip()
+
+
+RECOGNIZERS = {'tesseract': TesseractRecognizer}
+
+
+def create_recognizer(name):
+    """Build a recognizer by name; returns None if it is unknown or unavailable"""
+    factory = RECOGNIZERS.get(name)
+    if factory is None:
+        print(f"Unknown handwriting recognizer: {name}")
+        return None
+    try:
+        return factory()
+    except ImportError as e:
+        print(f"Handwriting recognizer '{name}' unavailable: {e}")
+        return None
+
+
+class HandwritingReader:
+    """Collects air strokes into words and recognizes them in the background"""
+
+    def __init__(self, recognizer=None, on_text=None, size=(256, 64), idle_seconds=1.0):
+        self.recognizer = recognizer
+        if recognizer is None:
+            # Said once here; submit() then just drops the words
+            print("Handwriting recognizer not configured; Write mode will not recognize text")
+        self.on_text = on_text
+        self.size = size
+        # Pen-up time after which the pending strokes count as a finished word
+        self.idle_seconds = idle_seconds
+
+        self.strokes = []   # finished strokes of the current word
+        self.active = {}    # pen id -> points of the stroke being written
+        self.last_up = None
+        self.pending = 0    # words queued or being recognized
+        self._lock = threading.Lock()
+
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()  # recognized text, drained by deliver()
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    # === Pen API (same calls as DrawingCanvas) ===
+    def pen_down(self, x, y, pen=None):
+        self.active[pen] = [(x, y)]
+
+    def pen_move(self, x, y, pen=None):
+        stroke = self.active.get(pen)
+        if stroke is None:
+            self.pen_down(x, y, pen)
+        elif stroke[-1] != (x, y):
+            stroke.append((x, y))
+
+    def pen_up(self, pen=None):
+        stroke = self.active.pop(pen, None)
+        if stroke:
+            self.strokes.append(stroke)
+            self.last_up = time.time()
+
+    def update(self, now=None):
+        """Submit the current word once every pen has been up long enough"""
+        if not self.strokes or self.active:
+            return False
+        now = time.time() if now is None else now
+        if now - self.last_up < self.idle_seconds:
+            return False
+        return self.submit()
+
+    def submit(self):
+        """Queue the pending strokes for recognition"""
+        strokes = self.strokes + [s for s in self.active.values() if s]
+        self.cancel()
+        if not strokes:
+            return False
+        if self.recognizer is None:
+            return False
+        with self._lock:
+            self.pending += 1
+        self.jobs.put(strokes)
+        return True
+
+    def cancel(self):
+        """Discard the strokes of the current word"""
+        self.strokes = []
+        self.active = {}
+        self.last_up = None
+
+    def is_busy(self):
+        return self.pending > 0
+
+    def deliver(self):
+        """Pass recognized text to on_text on the calling (main) thread"""
+        while True:
+            try:
+                text = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if self.on_text:
+                self.on_text(text)
+
+    def draw(self, frame, color=(255, 255, 255), thickness=4):
+        """Draw the pending ink on frame"""
+        for stroke in self.strokes + list(self.active.values()):
+            if len(stroke) > 1:
+                cv2.polylines(frame, [np.array(stroke, dtype=np.int32)], False,
+                              color, thickness, cv2.LINE_AA)
+        return frame
+
+    def close(self):
+        self.jobs.put(None)
+        self.thread.join(timeout=2)
+
+    # === Worker Thread ===
+    def _worker(self):
+        while True:
+            strokes = self.jobs.get()
+            if strokes is None:
+                break
+            try:
+                image = rasterize_strokes(strokes, self.size)
+                text = self.recognizer.recognize(image)
+                if text:
+                    self.results.put(text)
+            except Exception as e:
+                print(f"Handwriting recognition error: {e}")
+            finally:
+                with self._lock:
+                    self.pending -= 1
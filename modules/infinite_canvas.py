@@ -0,0 +1,430 @@
+import math
+
+import cv2
+import numpy as np
+
+from .buffer_pool import FramePool, blend_canvas
+from .drawing import palette_slot
+from .shapes import recognize_shape, shape_bounds, shape_points
+
+class InfiniteCanvas:
+    """Pannable, zoomable canvas backed by sparse fixed-size chunks.
+
+    Ink lives in world coordinates (pixels at zoom 1). Chunks are BGRA arrays
+    allocated only when ink lands in them and dropped again once erased, so
+    memory follows the inked area rather than the board extent. The visible
+    viewport is rendered from the chunks that intersect it, using a mipmap
+    level when zoomed out, and cached until the ink or the view changes.
+
+    The pen API matches DrawingCanvas, so AirBoard can use either.
+    """
+
+    def __init__(self, width, height, color=(0, 255, 0), brush_size=5,
+                 palette=None, eraser_size=40, shape_snapping=False,
+                 chunk_size=256, min_zoom=0.125, max_zoom=4.0, pool=None,
+                 antialiasing=False, mipmap_cache_size=256):
+        self.width = width    # viewport size in screen pixels
+        self.height = height
+        self.color = color
+        self.brush_size = brush_size
+        self.eraser_size = eraser_size
+        self.shape_snapping = shape_snapping
+        self.line_type = cv2.LINE_AA if antialiasing else cv2.LINE_8
+        self.chunk_size = chunk_size
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+
+        self.chunks = {}    # (cx, cy) -> BGRA chunk
+        self.mipmaps = {}   # (level, cx, cy) -> downsampled BGRA chunk, oldest use first
+        self.mipmap_cache_size = mipmap_cache_size
+        self.offset_x = 0.0  # world coordinate at the viewport's top-left
+        self.offset_y = 0.0
+        self.zoom = 1.0
+
+        self.pens = {}
+        self.palette = palette or []
+
+        # Rendered viewport, rebuilt only when view_dirty is set
+        self.canvas = np.zeros((height, width, 4), dtype=np.uint8)
+        self.view_dirty = False
+        self.dirty_rect = None
+
+        # Same stroke listener hook as DrawingCanvas; points are in world pixels
+        self.stroke_listeners = []
+        self.pool = pool or FramePool()
+
+    def _emit_stroke(self, tool, points, size=0, pen=None):
+        if not self.stroke_listeners:
+            return
+        stroke = {'tool': tool, 'color': self.pen_color(pen), 'size': size, 'points': points}
+        for listener in self.stroke_listeners:
+            listener(stroke)
+
+    # === Pens ===
+    def get_pen(self, pen=None):
+        """Return the state dict for a pen id, creating it on first use"""
+        state = self.pens.get(pen)
+        if state is None:
+            color = slot = None
+            if pen is not None and self.palette:
+                slot = palette_slot(self.pens, self.palette)
+                color = self.palette[slot]
+            state = self.pens[pen] = {
+                'prev': None, 'color': color, 'slot': slot, 'points': None,
+                'backup': None, 'erase_prev': None, 'erase_points': None
+            }
+        return state
+
+    def pen_color(self, pen=None):
+        state = self.pens.get(pen)
+        return (state and state['color']) or self.color
+
+    def set_color(self, color, pen=None):
+        """Change drawing color (BGR format), for one pen or the default"""
+        if pen is None:
+            self.color = color
+        else:
+            self.get_pen(pen)['color'] = color
+
+    def set_brush_size(self, size):
+        self.brush_size = max(1, size)
+
+    def set_eraser_size(self, size):
+        self.eraser_size = max(1, size)
+
+    # === Coordinates ===
+    def to_world(self, x, y):
+        return self.offset_x + x / self.zoom, self.offset_y + y / self.zoom
+
+    def to_screen(self, wx, wy):
+        return (wx - self.offset_x) * self.zoom, (wy - self.offset_y) * self.zoom
+
+    def _world_size(self, size):
+        """Screen-space brush size in world pixels, so strokes look the same at any zoom"""
+        return max(1, int(round(size / self.zoom)))
+
+    def _chunk_range(self, x0, y0, x1, y1):
+        cs = self.chunk_size
+        for cy in range(int(math.floor(y0 / cs)), int(math.floor((y1 - 1) / cs)) + 1):
+            for cx in range(int(math.floor(x0 / cs)), int(math.floor((x1 - 1) / cs)) + 1):
+                yield cx, cy
+
+    def _touch(self, key):
+        """Invalidate caches after a chunk changed"""
+        for level in range(1, self._max_level() + 1):
+            self.mipmaps.pop((level, *key), None)
+        self._invalidate_view()
+
+    def _invalidate_view(self):
+        self.view_dirty = True
+        self.dirty_rect = (0, 0, self.width, self.height)
+
+    # === Raster Primitives (world space) ===
+    def _paint(self, rect, draw, color, pen=None, create=True):
+        """Run draw(chunk, origin, color) on every chunk intersecting a world rect.
+
+        Chunks are allocated on demand only when create is set (ink); with it
+        unset (erasing) missing chunks are skipped and emptied ones released.
+        Strokes being snapped have their backups updated before each change.
+        """
+        cs = self.chunk_size
+        strokes = [(p, state) for p, state in self.pens.items() if state['backup'] is not None]
+        for key in self._chunk_range(*rect):
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                if not create:
+                    continue
+                chunk = np.zeros((cs, cs, 4), dtype=np.uint8)
+            origin = (key[0] * cs, key[1] * cs)
+            if strokes:
+                self._track_ink(strokes, pen, key, rect, draw, erase=not create)
+            draw(chunk, origin, color)
+            if key not in self.chunks:
+                self.chunks[key] = chunk
+            elif not create and not chunk[:, :, 3].any():
+                del self.chunks[key]
+            self._touch(key)
+
+    def _track_ink(self, strokes, pen, key, rect, draw, erase=False):
+        """Update snapping backups before pen paints (or erases) inside one chunk.
+
+        Each stroke only owns the pixels it covered itself: the pen's own
+        backup saves them before their first change, other strokes give up
+        the pixels painted over, so a snap never restores someone else's ink.
+        """
+        cs = self.chunk_size
+        ox, oy = key[0] * cs, key[1] * cs
+        x0, y0 = max(rect[0], ox), max(rect[1], oy)
+        x1, y1 = min(rect[2], ox + cs), min(rect[3], oy + cs)
+        if x1 <= x0 or y1 <= y0:
+            return
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        draw(mask, (x0, y0), 255)
+        ink = mask > 0
+        local = (slice(y0 - oy, y1 - oy), slice(x0 - ox, x1 - ox))
+        chunk = self.chunks.get(key)
+        for other, state in strokes:
+            entry = state['backup'].get(key)
+            if other == pen and not erase:
+                if entry is None:
+                    entry = state['backup'][key] = {
+                        'pixels': np.zeros((cs, cs, 4), dtype=np.uint8),
+                        'mask': np.zeros((cs, cs), dtype=bool)
+                    }
+                new = ink & ~entry['mask'][local]
+                np.copyto(entry['pixels'][local], chunk[local] if chunk is not None else 0,
+                          where=new[:, :, None])
+                entry['mask'][local] |= ink
+            elif entry is not None:
+                entry['mask'][local] &= ~ink
+
+    def _restore_chunks(self, state):
+        """Undo the current stroke by restoring the pixels it still owns"""
+        cs = self.chunk_size
+        for key, entry in state['backup'].items():
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                if not entry['mask'].any():
+                    continue
+                chunk = self.chunks[key] = np.zeros((cs, cs, 4), dtype=np.uint8)
+            np.copyto(chunk, entry['pixels'], where=entry['mask'][:, :, None])
+            if not chunk[:, :, 3].any():
+                del self.chunks[key]
+            self._touch(key)
+
+    @staticmethod
+    def _segment_rect(p0, p1, size):
+        r = size // 2 + 1
+        return (int(math.floor(min(p0[0], p1[0]))) - r, int(math.floor(min(p0[1], p1[1]))) - r,
+                int(math.ceil(max(p0[0], p1[0]))) + r + 1, int(math.ceil(max(p0[1], p1[1]))) + r + 1)
+
+    def _line(self, p0, p1, color, size, pen=None, create=True, line_type=cv2.LINE_8):
+        def draw(chunk, origin, color):
+            a = (int(round(p0[0])) - origin[0], int(round(p0[1])) - origin[1])
+            b = (int(round(p1[0])) - origin[0], int(round(p1[1])) - origin[1])
+            cv2.line(chunk, a, b, color, size, line_type)
+        self._paint(self._segment_rect(p0, p1, size), draw, color, pen, create)
+
+    # === Pen Strokes ===
+    def draw_line(self, x, y, pen=None):
+        """Draw line from previous position to current (screen coordinates)"""
+        state = self.get_pen(pen)
+        point = self.to_world(x, y)
+        if state['prev'] is not None:
+            self._line(state['prev'], point, (*self.pen_color(pen), 255),
+                       self._world_size(self.brush_size), pen=pen,
+                       line_type=self.line_type)
+        if state['points'] is not None:
+            state['points'].append(point)
+        state['prev'] = point
+
+    def pen_down(self, x, y, pen=None):
+        state = self.get_pen(pen)
+        state['prev'] = self.to_world(x, y)
+        state['points'] = [state['prev']]
+        state['backup'] = {} if self.shape_snapping else None
+
+    def pen_move(self, x, y, pen=None):
+        self.draw_line(x, y, pen)
+
+    def pen_up(self, pen=None):
+        """Finish the current stroke, snapping it to a shape if enabled"""
+        state = self.pens.get(pen)
+        if state is None:
+            return None
+        shape = None
+        if self.shape_snapping and state['points'] and state['backup'] is not None:
+            shape = recognize_shape(state['points'], min_size=20 / self.zoom)
+            if shape is not None:
+                self._restore_chunks(state)
+                state['backup'] = None
+                self.draw_shape(shape, pen)
+        size = self._world_size(self.brush_size)
+        if shape is not None:
+            self._emit_stroke(shape[0], shape_points(shape), size, pen)
+        elif state['points']:
+            self._emit_stroke('pen', state['points'], size, pen)
+        state['points'] = None
+        state['backup'] = None
+        self.reset_position(pen)
+        return shape
+
+    def draw_shape(self, shape, pen=None):
+        """Draw a recognized shape tuple given in world coordinates"""
+        size = self._world_size(self.brush_size)
+        color = (*self.pen_color(pen), 255)
+        kind, a, b = shape
+
+        def draw(chunk, origin, color):
+            if kind == 'circle':
+                cv2.circle(chunk, (a[0] - origin[0], a[1] - origin[1]), b, color, size,
+                           self.line_type)
+                return
+            pa = (a[0] - origin[0], a[1] - origin[1])
+            pb = (b[0] - origin[0], b[1] - origin[1])
+            if kind == 'line':
+                cv2.line(chunk, pa, pb, color, size, self.line_type)
+            else:
+                cv2.rectangle(chunk, pa, pb, color, size, self.line_type)
+        self._paint(shape_bounds(shape, size), draw, color, pen)
+
+    def reset_position(self, pen=None):
+        state = self.pens.get(pen)
+        if state is not None:
+            state['prev'] = None
+
+    def reset_all(self):
+        for state in self.pens.values():
+            state['prev'] = None
+            state['erase_prev'] = None
+            state['erase_points'] = None
+            state['points'] = None
+            state['backup'] = None
+
+    def remove_pen(self, pen):
+        self.pens.pop(pen, None)
+
+    # === Eraser ===
+    def erase_line(self, x, y, pen=None):
+        state = self.get_pen(pen)
+        point = self.to_world(x, y)
+        prev = state['erase_prev'] or point
+        self._line(prev, point, (0, 0, 0, 0), self._world_size(self.eraser_size),
+                   pen=pen, create=False)
+        if state['erase_points'] is None:
+            state['erase_points'] = []
+        state['erase_points'].append(point)
+        state['erase_prev'] = point
+
+    def lift_eraser(self, pen=None):
+        state = self.pens.get(pen)
+        if state is None:
+            return
+        if state['erase_points']:
+            self._emit_stroke('eraser', state['erase_points'],
+                              self._world_size(self.eraser_size), pen)
+        state['erase_prev'] = None
+        state['erase_points'] = None
+
+    def fill(self, x, y, pen=None):
+        """Flood fill is unbounded on an infinite board, so it is not supported"""
+        return False
+
+    def clear(self):
+        self.chunks = {}
+        self.mipmaps = {}
+        self.reset_all()
+        self._invalidate_view()
+        self._emit_stroke('clear', [])
+
+    def pop_dirty_rect(self):
+        """Return the viewport region changed since the last call, or None"""
+        rect, self.dirty_rect = self.dirty_rect, None
+        return rect
+
+    # === View ===
+    def pan(self, dx, dy):
+        """Move the view by a screen-space drag of (dx, dy)"""
+        self.offset_x -= dx / self.zoom
+        self.offset_y -= dy / self.zoom
+        self._invalidate_view()
+
+    def zoom_at(self, factor, x, y):
+        """Scale the view by factor, keeping screen point (x, y) fixed"""
+        wx, wy = self.to_world(x, y)
+        self.zoom = min(self.max_zoom, max(self.min_zoom, self.zoom * factor))
+        self.offset_x = wx - x / self.zoom
+        self.offset_y = wy - y / self.zoom
+        self._invalidate_view()
+
+    def reset_view(self):
+        self.offset_x = self.offset_y = 0.0
+        self.zoom = 1.0
+        self._invalidate_view()
+
+    def _max_level(self):
+        return max(0, int(math.floor(math.log2(1 / self.min_zoom))))
+
+    def _mip(self, level, key):
+        """Chunk downsampled by 2**level, built lazily from the level above"""
+        if level == 0:
+            return self.chunks[key]
+        cached = self.mipmaps.pop((level, *key), None)
+        if cached is not None:
+            # Re-insert so dict order tracks recent use
+            self.mipmaps[(level, *key)] = cached
+            return cached
+        src = self._mip(level - 1, key)
+        size = max(1, src.shape[0] // 2)
+        mip = cv2.resize(src, (size, size), interpolation=cv2.INTER_AREA)
+        # Empty pixels are black, so averaging darkens edges; undo that
+        alpha = mip[:, :, 3:4]
+        edge = (alpha > 0) & (alpha < 255)
+        if edge.any():
+            scaled = mip[:, :, :3] * (255.0 / np.maximum(alpha, 1))
+            np.copyto(mip[:, :, :3], np.minimum(scaled, 255).astype(np.uint8),
+                      where=edge)
+        self.mipmaps[(level, *key)] = mip
+        self.trim_mipmaps()
+        return mip
+
+    def trim_mipmaps(self, max_size=None):
+        """Drop the least recently used mipmaps beyond the cache size"""
+        if max_size is not None:
+            self.mipmap_cache_size = max_size
+        while len(self.mipmaps) > self.mipmap_cache_size:
+            del self.mipmaps[next(iter(self.mipmaps))]
+
+    def render_view(self):
+        """Rebuild the viewport from the chunks it intersects"""
+        self.canvas[:] = 0
+        cs = self.chunk_size
+        level = 0
+        if self.zoom < 1:
+            level = min(self._max_level(), int(math.floor(math.log2(1 / self.zoom))))
+        x0, y0 = self.to_world(0, 0)
+        x1, y1 = self.to_world(self.width, self.height)
+        for key in self._chunk_range(int(math.floor(x0)), int(math.floor(y0)),
+                                     int(math.ceil(x1)), int(math.ceil(y1))):
+            if key not in self.chunks:
+                continue
+            sx0, sy0 = self.to_screen(key[0] * cs, key[1] * cs)
+            sx1, sy1 = self.to_screen((key[0] + 1) * cs, (key[1] + 1) * cs)
+            sx0, sy0, sx1, sy1 = (int(round(v)) for v in (sx0, sy0, sx1, sy1))
+            if sx1 <= sx0 or sy1 <= sy0:
+                continue
+            src = self._mip(level, key)
+            if src.shape[1] != sx1 - sx0 or src.shape[0] != sy1 - sy0:
+                interp = cv2.INTER_NEAREST if self.zoom > 1 else cv2.INTER_AREA
+                scaled = self.pool.get('chunk_scaled', (sy1 - sy0, sx1 - sx0, 4))
+                src = cv2.resize(src, (sx1 - sx0, sy1 - sy0), dst=scaled, interpolation=interp)
+            # Clip to the viewport
+            cx0, cy0 = max(0, sx0), max(0, sy0)
+            cx1, cy1 = min(self.width, sx1), min(self.height, sy1)
+            if cx1 > cx0 and cy1 > cy0:
+                self.canvas[cy0:cy1, cx0:cx1] = src[cy0 - sy0:cy1 - sy0, cx0 - sx0:cx1 - sx0]
+        self.view_dirty = False
+        return self.canvas
+
+    def get_canvas(self):
+        """BGR image of the whole inked area at zoom 1 (viewport size if empty)"""
+        if not self.chunks:
+            return np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        cs = self.chunk_size
+        xs = [k[0] for k in self.chunks]
+        ys = [k[1] for k in self.chunks]
+        min_x, min_y = min(xs), min(ys)
+        out = np.zeros(((max(ys) - min_y + 1) * cs, (max(xs) - min_x + 1) * cs, 3), dtype=np.uint8)
+        for (cx, cy), chunk in self.chunks.items():
+            x, y = (cx - min_x) * cs, (cy - min_y) * cs
+            out[y:y + cs, x:x + cs] = chunk[:, :, :3]
+        return out
+
+    def overlay_on_frame(self, frame):
+        """Blend the visible part of the board onto the camera frame"""
+        if self.view_dirty:
+            self.render_view()
+        if not self.chunks:
+            return frame
+
+        return blend_canvas(frame, self.canvas, self.pool)
@@ -1,8 +1,11 @@
 import cv2
 import time
 
+from .buffer_pool import FramePool, blend_rect
+
 class VirtualKeyboard:
-    def __init__(self, key_w=80, key_h=80, key_margin=14, hover_threshold=1.5):
+    def __init__(self, key_w=80, key_h=80, key_margin=14, hover_threshold=1.5, pool=None,
+                 antialiasing=True):
         self.keys = [
             ['Q', 'W', 'E', 'R', 'T', 'Y', 'U', 'I', 'O', 'P'],
             ['A', 'S', 'D', 'F', 'G', 'H', 'J', 'K', 'L'],
@@ -17,6 +20,8 @@ class VirtualKeyboard:
         self.hover_time = {}
         self.hover_threshold = hover_threshold
         self.last_activated_key = None
+        self.pool = pool or FramePool()
+        self.line_type = cv2.LINE_AA if antialiasing else cv2.LINE_8
 
     def draw(self, frame, panel_rect=None):
         # Panel background under keys (semi-transparent)
@@ -32,10 +37,8 @@ class VirtualKeyboard:
             area_w = pw
         panel_y = self.start_y - 50
         panel_h = 4 * (self.key_h + self.key_margin) + 70
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (panel_x, panel_y), 
-                      (panel_x+panel_w, panel_y+panel_h), (32,32,64), -1, cv2.LINE_AA)
-        frame = cv2.addWeighted(overlay, 0.4, frame, 0.6, 0)
+        blend_rect(frame, (panel_x, panel_y), (panel_x+panel_w, panel_y+panel_h),
+                   (32,32,64), 0.4, self.pool, 'keyboard_panel', self.line_type)
 
         # Key buttons (dynamically spaced)
         for i, row in enumerate(self.keys):
@@ -56,28 +59,29 @@ class VirtualKeyboard:
                 font_scale = 0.75 if len(key) > 1 else 1.15
 
                 # Shadow
-                cv2.rectangle(frame, (x+4, y+4), (x+key_width+4, y+self.key_h+4), shadow_color, -1, cv2.LINE_AA)
+                cv2.rectangle(frame, (x+4, y+4), (x+key_width+4, y+self.key_h+4), shadow_color, -1, self.line_type)
                 # Main
-                cv2.rectangle(frame, (x, y), (x+key_width, y+self.key_h), active_color, -1, cv2.LINE_AA)
-                cv2.rectangle(frame, (x, y), (x+key_width, y+self.key_h), border_color, 3, cv2.LINE_AA)
+                cv2.rectangle(frame, (x, y), (x+key_width, y+self.key_h), active_color, -1, self.line_type)
+                cv2.rectangle(frame, (x, y), (x+key_width, y+self.key_h), border_color, 3, self.line_type)
                 # Text
                 text_size = cv2.getTextSize(key, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 2)[0]
                 text_x = x + (key_width - text_size[0]) // 2
                 text_y = y + (self.key_h + text_size[1]) // 2
                 cv2.putText(frame, key, (text_x, text_y),
-                            cv2.FONT_HERSHEY_SIMPLEX, font_scale, text_color, 2, cv2.LINE_AA)
+                            cv2.FONT_HERSHEY_SIMPLEX, font_scale, text_color, 2, self.line_type)
                 row_x += key_width + self.key_margin
 
-        # Text display area
+        return self.draw_text_bar(frame, panel_x, panel_w)
+
+    def draw_text_bar(self, frame, panel_x, panel_w):
+        """Draw the typed text above the keys"""
         text_bg_y = self.start_y - 80
         text_bg_x = panel_x
         text_bg_w = panel_w
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (text_bg_x, text_bg_y),
-                      (text_bg_x+text_bg_w, text_bg_y+48), (52,170,240), -1, cv2.LINE_AA)
-        frame = cv2.addWeighted(overlay, 0.3, frame, 0.7, 0)
+        blend_rect(frame, (text_bg_x, text_bg_y), (text_bg_x+text_bg_w, text_bg_y+48),
+                   (52,170,240), 0.3, self.pool, 'keyboard_text', self.line_type)
         cv2.putText(frame, self.typed_text, (text_bg_x+28, text_bg_y+37),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 3, cv2.LINE_AA)
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 3, self.line_type)
         return frame
 
     def get_hovered_key(self, x, y, frame_w=None, panel_rect=None):
@@ -124,6 +128,15 @@ class VirtualKeyboard:
             self.last_activated_key = None
         return frame, None
 
+    def press_at(self, x, y, frame_w=None, panel_rect=None):
+        """Activate the key under (x, y) immediately, e.g. on a pinch click"""
+        key, _ = self.get_hovered_key(x, y, frame_w=frame_w, panel_rect=panel_rect)
+        if not key:
+            return None
+        self.hover_time = {}
+        self.last_activated_key = key
+        return self.activate_key(key)
+
     def activate_key(self, key):
         if key == '<-':
             self.typed_text = self.typed_text[:-1]
@@ -137,6 +150,12 @@ class VirtualKeyboard:
             self.typed_text += key
         return None
 
+    def append_word(self, word):
+        """Append a word, separated from the existing text by a space"""
+        if self.typed_text and not self.typed_text.endswith(' '):
+            self.typed_text += ' '
+        self.typed_text += word
+
     def get_text(self):
         return self.typed_text
 
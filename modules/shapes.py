@@ -0,0 +1,71 @@
+import numpy as np
+
+# Recognition tolerances, relative to the stroke size
+LINE_TOLERANCE = 0.08    # max deviation from the chord / chord length
+CLOSED_TOLERANCE = 0.2   # max end-to-start gap / path length for closed shapes
+RECT_TOLERANCE = 0.08    # max distance to the nearest bbox edge / shorter side
+RECT_MIN_FRACTION = 0.9  # fraction of points that must hug the bbox edges
+CIRCLE_TOLERANCE = 0.12  # max radius std / mean radius
+
+
+def recognize_shape(points, min_size=20):
+    """Snap a stroke to a line, rectangle or circle.
+
+    Returns ('line', (x0, y0), (x1, y1)), ('rect', (x0, y0), (x1, y1)),
+    ('circle', (cx, cy), radius) or None when the stroke is freehand.
+    """
+    if len(points) < 5:
+        return None
+    pts = np.asarray(points, dtype=np.float32)
+    lo, hi = pts.min(axis=0), pts.max(axis=0)
+    size = hi - lo
+    if size.max() < min_size:
+        return None
+
+    seg = np.diff(pts, axis=0)
+    path_len = float(np.sum(np.sqrt(np.sum(seg * seg, axis=1))))
+    start, end = pts[0], pts[-1]
+    gap = float(np.linalg.norm(end - start))
+
+    if gap > CLOSED_TOLERANCE * path_len:
+        # Open stroke: a line if every point stays close to the chord
+        chord = end - start
+        if gap < min_size:
+            return None
+        rel = pts - start
+        deviation = np.abs(rel[:, 0] * chord[1] - rel[:, 1] * chord[0]) / gap
+        if deviation.max() <= LINE_TOLERANCE * gap:
+            return ('line', tuple(int(v) for v in start), tuple(int(v) for v in end))
+        return None
+
+    # Closed stroke: rectangle if points hug the bounding box edges
+    edge_d = np.minimum(np.minimum(pts[:, 0] - lo[0], hi[0] - pts[:, 0]),
+                        np.minimum(pts[:, 1] - lo[1], hi[1] - pts[:, 1]))
+    if np.mean(edge_d <= RECT_TOLERANCE * size.min()) >= RECT_MIN_FRACTION:
+        return ('rect', tuple(int(v) for v in lo), tuple(int(v) for v in hi))
+
+    # Otherwise a circle if the radius is nearly constant
+    center = pts.mean(axis=0)
+    radii = np.sqrt(np.sum((pts - center) ** 2, axis=1))
+    if radii.std() <= CIRCLE_TOLERANCE * radii.mean():
+        return ('circle', tuple(int(v) for v in center), int(round(radii.mean())))
+    return None
+
+
+def shape_bounds(shape, thickness):
+    """Bounding box (x0, y0, x1, y1) of a recognized shape, unclipped"""
+    r = thickness // 2 + 1
+    kind, a, b = shape
+    if kind == 'circle':
+        (cx, cy), radius = a, b
+        return cx - radius - r, cy - radius - r, cx + radius + r + 1, cy + radius + r + 1
+    return (min(a[0], b[0]) - r, min(a[1], b[1]) - r,
+            max(a[0], b[0]) + r + 1, max(a[1], b[1]) + r + 1)
+
+
+def shape_points(shape):
+    """Defining points of a shape: both ends, both corners, or centre and a rim point"""
+    kind, a, b = shape
+    if kind == 'circle':
+        return [a, (a[0] + b, a[1])]
+    return [a, b]
@@ -1,58 +1,157 @@
 import cv2
+import heapq
 import os
+import threading
 from datetime import datetime
 
+SKETCH_EXTS = ('.png', '.jpg', '.jpeg', '.webp')
+THUMB_DIR_NAME = ".thumbs"
+
+
+def thumbnail_path(save_dir, filename):
+    """Cached thumbnail location for a sketch file"""
+    return os.path.join(save_dir, THUMB_DIR_NAME, filename + ".thumb.png")
+
+
+def make_thumbnail(src, dst, size):
+    """Write a thumbnail of src to dst; returns dst or None if unreadable"""
+    img = cv2.imread(src, cv2.IMREAD_REDUCED_COLOR_4)
+    if img is None:
+        return None
+    # INTER_AREA gives clean downscales
+    thumb = cv2.resize(img, tuple(size), interpolation=cv2.INTER_AREA)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    cv2.imwrite(dst, thumb)
+    return dst
+
+
+def iter_sketch_entries(save_dir):
+    """Stream os.DirEntry objects for sketch images without listing the whole directory"""
+    if not os.path.exists(save_dir):
+        return
+    with os.scandir(save_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.lower().endswith(SKETCH_EXTS):
+                yield entry
+
+
 class SketchManager:
-    def __init__(self, save_dir="sketches", thumbnail_size=(100, 75)):
+    def __init__(self, save_dir="sketches", thumbnail_size=(100, 75), session_dir=None,
+                 background_load=False, max_loaded=None):
         self.save_dir = save_dir
         self.thumbnail_size = thumbnail_size
+        self.session_dir = session_dir or os.path.join(save_dir, "sessions")
+        # Only the newest max_loaded sketches keep a thumbnail in memory
+        self.max_loaded = max_loaded
         self.sketches = []
+        self.count = 0
+        self._lock = threading.Lock()
+        self.loading = False
         
         # Create directory if it doesn't exist
         if not os.path.exists(save_dir):
             os.makedirs(save_dir)
         
-        self.load_sketches()
+        if background_load:
+            # Let the app show its first frame while the gallery fills in
+            self.loading = True
+            threading.Thread(target=self.load_sketches, daemon=True).start()
+        else:
+            self.load_sketches()
+
+    def _unique_path(self, directory, prefix, ext):
+        """Timestamped path that never overwrites an existing file"""
+        # Microseconds keep names sortable; the counter covers clock ties
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        filename = f"{prefix}_{timestamp}{ext}"
+        n = 1
+        while os.path.exists(os.path.join(directory, filename)):
+            filename = f"{prefix}_{timestamp}_{n}{ext}"
+            n += 1
+        return os.path.join(directory, filename), timestamp
+
+    def new_session_path(self):
+        """Path for a new stroke log recording"""
+        if not os.path.exists(self.session_dir):
+            os.makedirs(self.session_dir)
+        return self._unique_path(self.session_dir, "session", ".absl")[0]
+
+    def list_sessions(self):
+        """Paths of recorded stroke logs, oldest first"""
+        if not os.path.exists(self.session_dir):
+            return []
+        return sorted(entry.path for entry in os.scandir(self.session_dir)
+                      if entry.is_file() and entry.name.endswith('.absl'))
     
     def save_sketch(self, canvas):
         """Save current sketch with thumbnail"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"sketch_{timestamp}.png"
-        filepath = os.path.join(self.save_dir, filename)
+        filepath, timestamp = self._unique_path(self.save_dir, "sketch", ".png")
+        filename = os.path.basename(filepath)
         
         # Save full-size sketch
         cv2.imwrite(filepath, canvas)
         
-        # Create and store thumbnail
-        thumbnail = cv2.resize(canvas, self.thumbnail_size)
-        self.sketches.append({
-            'filepath': filepath,
-            'filename': filename,
-            'thumbnail': thumbnail,
-            'timestamp': timestamp
-        })
+        # Create and store thumbnail, caching it for the next start
+        thumbnail = cv2.resize(canvas, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        thumb_file = thumbnail_path(self.save_dir, filename)
+        os.makedirs(os.path.dirname(thumb_file), exist_ok=True)
+        cv2.imwrite(thumb_file, thumbnail)
+        with self._lock:
+            self.sketches.append({
+                'filepath': filepath,
+                'filename': filename,
+                'thumbnail': thumbnail,
+                'timestamp': timestamp
+            })
+            self.count += 1
+            if self.max_loaded is not None:
+                del self.sketches[:len(self.sketches) - self.max_loaded]
         
         return filename
     
     def load_sketches(self):
-        """Load existing sketches from directory"""
-        if os.path.exists(self.save_dir):
-            files = sorted([f for f in os.listdir(self.save_dir) if f.endswith('.png')])
-            for filename in files:
-                filepath = os.path.join(self.save_dir, filename)
-                try:
-                    img = cv2.imread(filepath)
-                    if img is not None:
-                        thumbnail = cv2.resize(img, self.thumbnail_size)
-                        timestamp = filename.replace('sketch_', '').replace('.png', '')
-                        self.sketches.append({
-                            'filepath': filepath,
-                            'filename': filename,
-                            'thumbnail': thumbnail,
-                            'timestamp': timestamp
-                        })
-                except Exception as e:
-                    print(f"Error loading {filename}: {e}")
+        """Load existing sketches from directory.
+
+        Cached thumbnails are used when present, so startup does not decode
+        every full-size sketch; missing ones are generated and cached. With
+        max_loaded set, the rest are only counted.
+        """
+        loaded = []
+        count = 0
+        newest = []  # min-heap of (name, entry) for the max_loaded newest sketches
+        for entry in iter_sketch_entries(self.save_dir):
+            count += 1
+            item = (entry.name, entry)
+            if self.max_loaded is None or len(newest) < self.max_loaded:
+                heapq.heappush(newest, item)
+            elif newest and item > newest[0]:
+                heapq.heapreplace(newest, item)
+        for _, entry in sorted(newest):
+            filename = entry.name
+            try:
+                thumb_file = thumbnail_path(self.save_dir, filename)
+                thumbnail = cv2.imread(thumb_file) if os.path.exists(thumb_file) else None
+                if thumbnail is None and make_thumbnail(entry.path, thumb_file, self.thumbnail_size):
+                    thumbnail = cv2.imread(thumb_file)
+                if thumbnail is not None:
+                    if thumbnail.shape[1::-1] != tuple(self.thumbnail_size):
+                        thumbnail = cv2.resize(thumbnail, self.thumbnail_size)
+                    timestamp = os.path.splitext(filename)[0].replace('sketch_', '')
+                    loaded.append({
+                        'filepath': entry.path,
+                        'filename': filename,
+                        'thumbnail': thumbnail,
+                        'timestamp': timestamp
+                    })
+            except Exception as e:
+                print(f"Error loading {filename}: {e}")
+        # Older sketches go before anything saved while loading
+        with self._lock:
+            self.sketches[:0] = loaded
+            self.count += count
+            if self.max_loaded is not None:
+                del self.sketches[:len(self.sketches) - self.max_loaded]
+        self.loading = False
     
     def draw_gallery(self, frame, max_display=5, x_offset=None, y_offset=None, orientation='vertical', spacing=10):
         """Draw sketch thumbnails on frame at optional (x_offset, y_offset).
@@ -66,7 +165,8 @@ class SketchManager:
         # Gallery header
         cv2.rectangle(frame, (x_offset-10, y_offset-30), 
                      (x_offset+110, y_offset-5), (50, 50, 50), -1)
-        cv2.putText(frame, f"Saved ({len(self.sketches)})", (x_offset, y_offset - 10), 
+        count = f"{self.count}..." if self.loading else self.count
+        cv2.putText(frame, f"Saved ({count})", (x_offset, y_offset - 10), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         
         # Display last N sketches
@@ -98,15 +198,20 @@ class SketchManager:
     
     def get_sketch_count(self):
         """Return number of saved sketches"""
-        return len(self.sketches)
+        return self.count
     
     def clear_all(self):
         """Delete all sketches"""
-        for sketch in self.sketches:
+        # From the directory, since only the newest ones may be loaded
+        for entry in list(iter_sketch_entries(self.save_dir)):
             try:
-                if os.path.exists(sketch['filepath']):
-                    os.remove(sketch['filepath'])
+                os.remove(entry.path)
+                thumb_file = thumbnail_path(self.save_dir, entry.name)
+                if os.path.exists(thumb_file):
+                    os.remove(thumb_file)
             except Exception as e:
-                print(f"Error deleting {sketch['filename']}: {e}")
+                print(f"Error deleting {entry.name}: {e}")
         
-        self.sketches = []
\ No newline at end of file
+        with self._lock:
+            self.sketches = []
+            self.count = 0
\ No newline at end of file
@@ -0,0 +1,315 @@
+"""
+Compact binary stroke log for recording whiteboard sessions.
+
+Layout (little endian):
+    file header   '<4sB3xHH'   magic b'ABSL', version, board width, height
+    stroke header '<BBBBHHIii' tool, B, G, R, brush size, point count, time (ms),
+                               first point x, y
+    points        count * 2 int16 deltas from the previous point (the first
+                  from the header's point, so it is 0, 0); int32 instead when
+                  the tool byte has the WIDE bit, for jumps int16 cannot hold
+
+Version 1 files (int16 absolute first point, no header point) are still read.
+
+A width/height of 0 means an unbounded (infinite canvas) board; renderers
+then use the extent of the recorded points.
+"""
+
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+MAGIC = b'ABSL'
+VERSION = 2
+FILE_HEADER = struct.Struct('<4sB3xHH')
+STROKE_HEADER = struct.Struct('<BBBBHHIii')
+STROKE_DTYPE = np.dtype([('tool', 'u1'), ('b', 'u1'), ('g', 'u1'), ('r', 'u1'),
+                         ('size', '<u2'), ('count', '<u2'), ('time', '<u4'),
+                         ('x', '<i4'), ('y', '<i4')])
+# Version 1 stroke header, without the first point
+STROKE_DTYPE_V1 = np.dtype(STROKE_DTYPE.descr[:-2])
+WIDE = 0x80  # tool byte flag: the stroke's deltas are int32
+
+# Tool codes
+TOOLS = ['pen', 'eraser', 'fill', 'line', 'rect', 'circle', 'clear']
+TOOL_CODES = {name: code for code, name in enumerate(TOOLS)}
+
+MAX_POINTS = 0xFFFF
+
+
+def encode_stroke(stroke, t_ms):
+    """Pack a stroke dict into header + delta-encoded points"""
+    pts = np.asarray(stroke.get('points') or [], dtype=np.float64).reshape(-1, 2)
+    pts = np.round(pts[:MAX_POINTS]).astype(np.int64)
+    first = pts[0] if len(pts) else np.zeros(2, dtype=np.int64)
+    deltas = np.diff(pts, axis=0, prepend=first[None])
+    tool = TOOL_CODES[stroke['tool']]
+    # Far jumps (infinite canvas) do not fit int16; store those strokes wide
+    if len(deltas) and (deltas.min() < -32768 or deltas.max() > 32767):
+        tool |= WIDE
+        deltas = deltas.astype('<i4')
+    else:
+        deltas = deltas.astype('<i2')
+    b, g, r = (int(c) for c in stroke.get('color') or (0, 0, 0))
+    header = STROKE_HEADER.pack(tool, b, g, r,
+                                min(int(stroke.get('size') or 0), 0xFFFF), len(pts),
+                                int(t_ms) & 0xFFFFFFFF, int(first[0]), int(first[1]))
+    return header + deltas.tobytes()
+
+
+class StrokeLogWriter:
+    """Appends finished strokes to a session file as they are drawn.
+
+    Usable directly as a DrawingCanvas stroke listener.
+    """
+
+    def __init__(self, path, width=0, height=0):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new_file:
+            with open(path, 'rb') as f:
+                magic, version = FILE_HEADER.unpack(f.read(FILE_HEADER.size))[:2]
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Cannot append to {path}: not a version {VERSION} stroke log")
+        self.file = open(path, 'ab')
+        if new_file:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION, width, height))
+            self.file.flush()
+        self.start = time.monotonic()
+        self.stroke_count = 0
+
+    def append(self, stroke):
+        t_ms = (time.monotonic() - self.start) * 1000
+        self.file.write(encode_stroke(stroke, t_ms))
+        # Flush per stroke so a crash loses at most the stroke in progress
+        self.file.flush()
+        self.stroke_count += 1
+
+    __call__ = append
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+class StrokeLog:
+    """Memory-mapped reader for a stroke log file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, self.version, self.width, self.height = FILE_HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a stroke log")
+        if self.version not in (1, VERSION):
+            raise ValueError(f"Unsupported stroke log version {self.version}")
+        self.header = STROKE_DTYPE if self.version == VERSION else STROKE_DTYPE_V1
+        self._offsets = None
+
+    def offsets(self):
+        """Byte offset of every stroke header, scanned once"""
+        if self._offsets is None:
+            offsets = []
+            off, end = FILE_HEADER.size, len(self.data)
+            while off + self.header.itemsize <= end:
+                tool = int(self.data[off])
+                count = int(np.frombuffer(self.data, dtype='<u2', count=1, offset=off + 6)[0])
+                next_off = off + self.header.itemsize + count * (8 if tool & WIDE else 4)
+                if next_off > end:
+                    break  # truncated final record
+                offsets.append(off)
+                off = next_off
+            self._offsets = offsets
+        return self._offsets
+
+    def __len__(self):
+        return len(self.offsets())
+
+    def stroke(self, i):
+        off = self.offsets()[i]
+        head = np.frombuffer(self.data, dtype=self.header, count=1, offset=off)[0]
+        count, tool = int(head['count']), int(head['tool'])
+        deltas = np.frombuffer(self.data, dtype='<i4' if tool & WIDE else '<i2', count=count * 2,
+                               offset=off + self.header.itemsize).reshape(-1, 2)
+        points = np.cumsum(deltas, axis=0, dtype=np.int64)
+        if self.version == VERSION:
+            points += (int(head['x']), int(head['y']))
+        return {
+            'tool': TOOLS[tool & ~WIDE],
+            'color': (int(head['b']), int(head['g']), int(head['r'])),
+            'size': int(head['size']),
+            'time': int(head['time']),
+            'points': points,
+        }
+
+    def strokes(self):
+        for i in range(len(self)):
+            yield self.stroke(i)
+
+    def bounds(self):
+        """(x0, y0, x1, y1) of the board: its size, or the recorded extent"""
+        if self.width and self.height:
+            return 0, 0, self.width, self.height
+        lo, hi = None, None
+        for stroke in self.strokes():
+            pts = stroke['points']
+            if not len(pts):
+                continue
+            r = stroke['size'] // 2 + 1
+            if stroke['tool'] == 'circle' and len(pts) > 1:
+                r += abs(int(pts[1][0] - pts[0][0]))
+            s_lo, s_hi = pts.min(axis=0) - r, pts.max(axis=0) + r + 1
+            lo = s_lo if lo is None else np.minimum(lo, s_lo)
+            hi = s_hi if hi is None else np.maximum(hi, s_hi)
+        if lo is None:
+            return 0, 0, 1, 1
+        return int(lo[0]), int(lo[1]), int(hi[0]), int(hi[1])
+
+
+# === Replay and Export ===
+
+def replay(log, scale=1.0, on_step=None, step_points=None):
+    """Replay a stroke log onto a fresh DrawingCanvas at the given scale.
+
+    If on_step is given it is called with the canvas after every stroke, or
+    every step_points points within pen/eraser strokes when set.
+    """
+    from .drawing import DrawingCanvas
+
+    x0, y0, x1, y1 = log.bounds()
+    width = max(1, int(round((x1 - x0) * scale)))
+    height = max(1, int(round((y1 - y0) * scale)))
+    canvas = DrawingCanvas(width, height)
+    origin = np.array([x0, y0])
+
+    def to_px(p):
+        q = (np.asarray(p) - origin) * scale
+        return int(round(q[0])), int(round(q[1]))
+
+    for stroke in log.strokes():
+        tool, pts = stroke['tool'], stroke['points']
+        size = max(1, int(round(stroke['size'] * scale)))
+        canvas.set_color(stroke['color'])
+        if tool == 'clear':
+            canvas.clear()
+        elif tool == 'pen' and len(pts):
+            canvas.set_brush_size(size)
+            canvas.pen_down(*to_px(pts[0]))
+            for i, p in enumerate(pts[1:], 1):
+                canvas.pen_move(*to_px(p))
+                if on_step and step_points and i % step_points == 0:
+                    on_step(canvas)
+            canvas.reset_position()
+        elif tool == 'eraser' and len(pts):
+            canvas.set_eraser_size(size)
+            for i, p in enumerate(pts, 1):
+                canvas.erase_line(*to_px(p))
+                if on_step and step_points and i % step_points == 0:
+                    on_step(canvas)
+            canvas.lift_eraser()
+        elif tool == 'fill' and len(pts):
+            canvas.fill(*to_px(pts[0]))
+        elif tool in ('line', 'rect') and len(pts) >= 2:
+            canvas.set_brush_size(size)
+            canvas.draw_shape((tool, to_px(pts[0]), to_px(pts[1])))
+        elif tool == 'circle' and len(pts) >= 2:
+            canvas.set_brush_size(size)
+            radius = int(round(abs(int(pts[1][0]) - int(pts[0][0])) * scale))
+            canvas.draw_shape(('circle', to_px(pts[0]), radius))
+        if on_step:
+            on_step(canvas)
+    return canvas
+
+
+def export_png(log, out_path, scale=1.0):
+    canvas = replay(log, scale)
+    cv2.imwrite(out_path, canvas.get_canvas())
+    return out_path
+
+
+def export_svg(log, out_path, scale=1.0):
+    """Vector export. Erasing is drawn in the background color and flood
+    fills, which have no vector form, are skipped."""
+    x0, y0, x1, y1 = log.bounds()
+    w, h = (x1 - x0) * scale, (y1 - y0) * scale
+
+    def fmt(p):
+        return f"{(p[0] - x0) * scale:.1f},{(p[1] - y0) * scale:.1f}"
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{w:.0f}" height="{h:.0f}" '
+             f'viewBox="0 0 {w:.0f} {h:.0f}">',
+             f'<rect width="100%" height="100%" fill="#000"/>']
+    for stroke in log.strokes():
+        tool, pts = stroke['tool'], stroke['points']
+        b, g, r = stroke['color']
+        color = '#000' if tool == 'eraser' else f'#{r:02x}{g:02x}{b:02x}'
+        width = max(1.0, stroke['size'] * scale)
+        style = (f'fill="none" stroke="{color}" stroke-width="{width:.1f}" '
+                 f'stroke-linecap="round" stroke-linejoin="round"')
+        if tool == 'clear':
+            parts.append('<rect width="100%" height="100%" fill="#000"/>')
+        elif tool in ('pen', 'eraser') and len(pts):
+            parts.append(f'<polyline {style} points="{" ".join(fmt(p) for p in pts)}"/>')
+        elif tool == 'line' and len(pts) >= 2:
+            (ax, ay), (bx, by) = fmt(pts[0]).split(','), fmt(pts[1]).split(',')
+            parts.append(f'<line {style} x1="{ax}" y1="{ay}" x2="{bx}" y2="{by}"/>')
+        elif tool == 'rect' and len(pts) >= 2:
+            lo, hi = np.minimum(pts[0], pts[1]), np.maximum(pts[0], pts[1])
+            ax, ay = fmt(lo).split(',')
+            parts.append(f'<rect {style} x="{ax}" y="{ay}" width="{(hi[0] - lo[0]) * scale:.1f}" '
+                         f'height="{(hi[1] - lo[1]) * scale:.1f}"/>')
+        elif tool == 'circle' and len(pts) >= 2:
+            cx, cy = fmt(pts[0]).split(',')
+            radius = abs(int(pts[1][0]) - int(pts[0][0])) * scale
+            parts.append(f'<circle {style} cx="{cx}" cy="{cy}" r="{radius:.1f}"/>')
+    parts.append('</svg>')
+    with open(out_path, 'w') as f:
+        f.write('\n'.join(parts))
+    return out_path
+
+
+def export_timelapse(log, out_path, scale=1.0, fps=30, step_points=8):
+    """Write an MP4 that redraws the session stroke by stroke"""
+    writer = None
+
+    def write_frame(canvas):
+        nonlocal writer
+        if writer is None:
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            writer = cv2.VideoWriter(out_path, fourcc, fps, (canvas.width, canvas.height))
+        writer.write(canvas.get_canvas())
+
+    replay(log, scale, on_step=write_frame, step_points=step_points)
+    if writer is not None:
+        writer.release()
+    return out_path
+
+
+EXPORTERS = {'png': export_png, 'svg': export_svg, 'mp4': export_timelapse}
+
+
+def _export_one(job):
+    path, out_dir, formats, scale = job
+    log = StrokeLog(path)
+    base = os.path.splitext(os.path.basename(path))[0]
+    return [EXPORTERS[fmt](log, os.path.join(out_dir, f"{base}.{fmt}"), scale)
+            for fmt in formats]
+
+
+def export_sessions(paths, out_dir, formats=('png',), scale=1.0, workers=None):
+    """Export many stroke logs in a process pool; returns the written paths"""
+    for fmt in formats:
+        if fmt not in EXPORTERS:
+            raise ValueError(f"Unknown export format: {fmt}")
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(path, out_dir, tuple(formats), scale) for path in paths]
+    written = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for outputs in pool.map(_export_one, jobs, chunksize=4):
+            written.extend(outputs)
+    return written
@@ -0,0 +1,64 @@
+import numpy as np
+
+# Wrist and finger MCPs, averaged as a stable palm centre
+PALM_POINTS = [0, 5, 9, 13, 17]
+
+
+def palm_centers(landmarks):
+    """(N, 2) normalized palm centres for a (N, 21, 3) landmark array"""
+    return landmarks[:, PALM_POINTS, :2].mean(axis=1)
+
+
+class HandTrackAssociator:
+    """Gives each hand a stable track id across frames.
+
+    Detections are matched to existing tracks by greedy nearest-neighbour
+    association on the palm centre. Unmatched detections start new tracks,
+    and tracks unseen for more than max_missed_frames are dropped.
+    """
+
+    def __init__(self, max_distance=0.15, max_missed_frames=5):
+        self.max_distance = max_distance
+        self.max_missed_frames = max_missed_frames
+        self.tracks = {}  # track id -> {'pos': (2,) array, 'missed': int}
+        self.next_id = 0
+
+    def update(self, landmarks):
+        """Return a list of track ids aligned with the landmark array"""
+        points = palm_centers(landmarks) if len(landmarks) else np.zeros((0, 2))
+        ids = [None] * len(points)
+        track_ids = list(self.tracks)
+
+        if len(points) and track_ids:
+            prev = np.array([self.tracks[t]['pos'] for t in track_ids])
+            dist = np.linalg.norm(points[:, None, :] - prev[None, :, :], axis=2)
+            used_tracks = set()
+            for flat in np.argsort(dist, axis=None):
+                d, t = np.unravel_index(flat, dist.shape)
+                if dist[d, t] > self.max_distance:
+                    break
+                if ids[d] is not None or t in used_tracks:
+                    continue
+                ids[d] = track_ids[t]
+                used_tracks.add(t)
+
+        for d, point in enumerate(points):
+            if ids[d] is None:
+                ids[d] = self.next_id
+                self.next_id += 1
+                self.tracks[ids[d]] = {'pos': point.copy(), 'missed': 0}
+            else:
+                track = self.tracks[ids[d]]
+                track['pos'] = point.copy()
+                track['missed'] = 0
+
+        seen = set(ids)
+        for t in track_ids:
+            if t not in seen:
+                self.tracks[t]['missed'] += 1
+                if self.tracks[t]['missed'] > self.max_missed_frames:
+                    del self.tracks[t]
+        return ids
+
+    def active_ids(self):
+        return list(self.tracks)
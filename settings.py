@@ -0,0 +1,214 @@
+"""
+Typed runtime settings with performance presets and hot reload.
+
+config.py holds the defaults; this module groups the settings that can be
+tuned while the app runs into dataclasses. A settings file (JSON) picks a
+preset and overrides individual fields:
+
+    {
+        "preset": "low-power",
+        "performance": {"inference_interval": 3},
+        "keyboard": {"hover_threshold": 0.8},
+        "ai_model": "gemini-2.0-flash"
+    }
+
+SettingsWatcher polls the file's mtime and returns the new Settings when it
+changes, so kiosks can be retuned without restarting (and losing the board).
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass, field, fields, replace
+
+import config
+
+
+@dataclass
+class PerformanceSettings:
+    camera_width: int = config.CAMERA_WIDTH
+    camera_height: int = config.CAMERA_HEIGHT
+    camera_fps: int = config.CAMERA_FPS
+    inference_interval: int = config.INFERENCE_INTERVAL  # hand tracking every Nth frame
+    antialias_ink: bool = config.ANTIALIAS_INK
+    antialias_ui: bool = config.ANTIALIAS_UI
+    canvas_tile_size: int = config.CANVAS_TILE_SIZE
+    fill_window: int = config.FILL_WINDOW
+    chunk_size: int = config.CHUNK_SIZE  # only read at startup
+    mipmap_cache_size: int = config.MIPMAP_CACHE_SIZE
+    share_tile_size: int = config.SHARE_TILE_SIZE
+    share_queue_size: int = config.SHARE_QUEUE_SIZE
+
+
+@dataclass
+class KeyboardSettings:
+    key_width: int = config.KEY_WIDTH
+    key_height: int = config.KEY_HEIGHT
+    key_margin: int = config.KEY_MARGIN
+    hover_threshold: float = config.HOVER_THRESHOLD
+
+
+@dataclass
+class DrawingSettings:
+    brush_size: int = config.DEFAULT_BRUSH_SIZE
+    eraser_size: int = config.ERASER_SIZE
+    shape_snapping: bool = config.SHAPE_SNAPPING
+
+
+PRESETS = {
+    'low-power': PerformanceSettings(
+        camera_width=640, camera_height=360, camera_fps=15, inference_interval=2,
+        antialias_ink=False, antialias_ui=False, canvas_tile_size=128, fill_window=128,
+        mipmap_cache_size=64, share_tile_size=128, share_queue_size=8),
+    'balanced': PerformanceSettings(),
+    'high-quality': PerformanceSettings(
+        camera_width=1920, camera_height=1080, camera_fps=30, inference_interval=1,
+        antialias_ink=True, antialias_ui=True, canvas_tile_size=32, fill_window=512,
+        mipmap_cache_size=1024, share_tile_size=64, share_queue_size=32),
+}
+
+# Fields that need a restart; changing them in a reload only prints a notice
+RESTART_ONLY = ('performance.chunk_size',)
+
+# Smallest accepted value of numeric fields; anything lower would break the app
+MINIMUMS = {
+    'performance.camera_width': 1,
+    'performance.camera_height': 1,
+    'performance.camera_fps': 1,
+    'performance.inference_interval': 1,
+    'performance.canvas_tile_size': 1,
+    'performance.fill_window': 2,  # the fill window doubles from half of this
+    'performance.chunk_size': 1,
+    'performance.mipmap_cache_size': 0,
+    'performance.share_tile_size': 1,
+    'performance.share_queue_size': 1,
+    'keyboard.key_width': 1,
+    'keyboard.key_height': 1,
+    'keyboard.key_margin': 0,
+    'keyboard.hover_threshold': 0.0,
+    'drawing.brush_size': 1,
+    'drawing.eraser_size': 1,
+}
+
+
+@dataclass
+class Settings:
+    preset: str = 'balanced'
+    performance: PerformanceSettings = field(default_factory=PerformanceSettings)
+    keyboard: KeyboardSettings = field(default_factory=KeyboardSettings)
+    drawing: DrawingSettings = field(default_factory=DrawingSettings)
+    ai_model: str = config.AI_MODEL
+
+
+def _check(name, value, kind):
+    """Validate a JSON value against a field type and its minimum"""
+    if kind is float and isinstance(value, int) and not isinstance(value, bool):
+        value = float(value)
+    if kind in (int, float) and isinstance(value, bool):
+        raise ValueError(f"{name} must be {kind.__name__}, got bool")
+    if not isinstance(value, kind):
+        raise ValueError(f"{name} must be {kind.__name__}, got {type(value).__name__}")
+    minimum = MINIMUMS.get(name)
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {value}")
+    return value
+
+
+def _override(section, values, name):
+    """Copy of a settings dataclass with the given fields replaced"""
+    if not isinstance(values, dict):
+        raise ValueError(f"{name} must be an object")
+    types = {f.name: f.type for f in fields(section)}
+    changes = {}
+    for key, value in values.items():
+        if key not in types:
+            raise ValueError(f"Unknown setting {name}.{key}")
+        changes[key] = _check(f"{name}.{key}", value, types[key])
+    return replace(section, **changes)
+
+
+def make_settings(preset=None, overrides=None):
+    """Settings for a preset name plus a dict of overrides (as in the file)"""
+    if overrides is not None and not isinstance(overrides, dict):
+        raise ValueError("Settings must be an object")
+    overrides = dict(overrides or {})
+    preset = overrides.pop('preset', preset or config.PRESET)
+    if not isinstance(preset, str) or preset not in PRESETS:
+        raise ValueError(f"Unknown preset {preset!r}, expected one of {', '.join(PRESETS)}")
+    settings = Settings(preset=preset, performance=replace(PRESETS[preset]))
+    for key, value in overrides.items():
+        if key in ('performance', 'keyboard', 'drawing'):
+            value = _override(getattr(settings, key), value, key)
+        elif key == 'ai_model':
+            value = _check(key, value, str)
+        else:
+            raise ValueError(f"Unknown setting {key}")
+        setattr(settings, key, value)
+    return settings
+
+
+def load_settings(path, preset=None):
+    """Read a settings file; a missing file gives the preset's defaults"""
+    if not os.path.exists(path):
+        return make_settings(preset)
+    with open(path) as f:
+        return make_settings(preset, json.load(f))
+
+
+def changed_fields(old, new):
+    """Dotted names of the fields that differ between two Settings"""
+    changed = []
+    for f in fields(Settings):
+        a, b = getattr(old, f.name), getattr(new, f.name)
+        if hasattr(a, '__dataclass_fields__'):
+            changed += [f"{f.name}.{s.name}" for s in fields(a)
+                        if getattr(a, s.name) != getattr(b, s.name)]
+        elif a != b:
+            changed.append(f.name)
+    return changed
+
+
+class SettingsWatcher:
+    """Reloads a settings file when its mtime changes.
+
+    poll() is meant to be called once per frame; it only stats the file every
+    interval seconds, and never raises on a bad file: a broken or invalid
+    file is reported and the current settings stay in effect.
+    """
+
+    def __init__(self, path, interval=1.0, preset=None):
+        self.path = path
+        self.interval = interval
+        self.preset = preset
+        self._mtime = self._stat()
+        self._next_check = 0.0
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self):
+        """Current settings, falling back to defaults if the file is invalid"""
+        try:
+            return load_settings(self.path, self.preset)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Error loading settings from {self.path}: {e}")
+            return make_settings(self.preset)
+
+    def poll(self, now=None):
+        """Return new Settings if the file changed since the last poll, else None"""
+        now = time.monotonic() if now is None else now
+        if now < self._next_check:
+            return None
+        self._next_check = now + self.interval
+        mtime = self._stat()
+        if mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        try:
+            return load_settings(self.path, self.preset)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Ignoring invalid settings file {self.path}: {e}")
+            return None
@@ -0,0 +1,269 @@
+"""
+Bulk sketch gallery maintenance, outside the live app.
+
+    python sketch_tool.py thumbnails [--force]
+    python sketch_tool.py convert --to jpg [--quality 90] [--delete-source]
+    python sketch_tool.py prune (--keep-last N | --older-than DAYS) [--dry-run]
+    python sketch_tool.py export ARCHIVE(.zip|.tar.gz) [--include-sessions]
+    python sketch_tool.py render-sessions OUT_DIR [--format png svg mp4] [--scale 2]
+
+Directories are scanned with os.scandir and processed in bounded batches, so
+tens of thousands of sketches never have to be held in memory at once.
+"""
+
+import argparse
+import heapq
+import os
+import shutil
+import sys
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import cv2
+
+import config
+from modules.sketch_manager import iter_sketch_entries, make_thumbnail, thumbnail_path
+
+BATCH_SIZE = 256
+
+
+def run_batched(fn, jobs, workers=None):
+    """Map fn over a job iterator in a process pool, one batch at a time.
+
+    Executor.map submits everything up front, so jobs are fed in slices of
+    BATCH_SIZE to keep memory flat for huge directories.
+    """
+    done = failed = 0
+    jobs = iter(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = list(islice(jobs, BATCH_SIZE))
+            if not batch:
+                break
+            for ok in pool.map(fn, batch, chunksize=16):
+                done += 1
+                failed += 0 if ok else 1
+    return done, failed
+
+
+# === Workers (top-level so they can be pickled) ===
+
+def _thumbnail_job(job):
+    src, dst, size = job
+    try:
+        return make_thumbnail(src, dst, size) is not None
+    except Exception as e:
+        print(f"Error creating thumbnail for {src}: {e}")
+        return False
+
+
+def _convert_job(job):
+    src, dst, params, delete_source = job
+    try:
+        img = cv2.imread(src, cv2.IMREAD_UNCHANGED)
+        if img is None or not cv2.imwrite(dst, img, params):
+            return False
+        # Keep the sketch's age, which prune --older-than goes by
+        shutil.copystat(src, dst)
+        # Carry the cached thumbnail over to the new file name
+        directory = os.path.dirname(src)
+        src_thumb = thumbnail_path(directory, os.path.basename(src))
+        dst_thumb = thumbnail_path(directory, os.path.basename(dst))
+        if os.path.exists(src_thumb):
+            if delete_source:
+                os.replace(src_thumb, dst_thumb)
+            else:
+                shutil.copyfile(src_thumb, dst_thumb)
+        if delete_source:
+            os.remove(src)
+        return True
+    except Exception as e:
+        print(f"Error converting {src}: {e}")
+        return False
+
+
+def _delete_job(path):
+    try:
+        os.remove(path)
+        thumb = thumbnail_path(os.path.dirname(path), os.path.basename(path))
+        if os.path.exists(thumb):
+            os.remove(thumb)
+        return True
+    except OSError as e:
+        print(f"Error deleting {path}: {e}")
+        return False
+
+
+# === Commands ===
+
+def cmd_thumbnails(args):
+    size = tuple(args.size)
+
+    def jobs():
+        for entry in iter_sketch_entries(args.dir):
+            dst = thumbnail_path(args.dir, entry.name)
+            if args.force or not os.path.exists(dst) or os.path.getmtime(dst) < entry.stat().st_mtime:
+                yield entry.path, dst, size
+
+    done, failed = run_batched(_thumbnail_job, jobs(), args.workers)
+    print(f"Thumbnails: {done - failed} written, {failed} failed")
+
+
+def cmd_convert(args):
+    ext = '.' + args.to.lower().lstrip('.')
+    if ext in ('.jpg', '.jpeg'):
+        params = [cv2.IMWRITE_JPEG_QUALITY, args.quality]
+    elif ext == '.webp':
+        params = [cv2.IMWRITE_WEBP_QUALITY, args.quality]
+    else:
+        params = [cv2.IMWRITE_PNG_COMPRESSION, 3]
+
+    skipped = []
+
+    def jobs():
+        targets = set()
+        for entry in iter_sketch_entries(args.dir):
+            stem, src_ext = os.path.splitext(entry.name)
+            if src_ext.lower() == ext:
+                continue
+            dst = os.path.join(args.dir, stem + ext)
+            # Never overwrite a file, including one another source converts to
+            if dst in targets or os.path.exists(dst):
+                skipped.append(entry.path)
+                continue
+            targets.add(dst)
+            yield entry.path, dst, params, args.delete_source
+
+    done, failed = run_batched(_convert_job, jobs(), args.workers)
+    for path in skipped:
+        print(f"Skipped {path}: target exists")
+    print(f"Converted: {done - failed} files to {ext}, {failed} failed, {len(skipped)} skipped")
+
+
+def select_prunable(directory, keep_last=None, older_than_days=None):
+    """Yield paths to delete, streaming the directory once.
+
+    older_than_days goes by modification time. keep_last ranks sketches by
+    their timestamped file name, like the app's gallery, and holds only the N
+    newest entries in a heap, so memory stays bounded by N rather than by the
+    directory size; 0 selects every sketch.
+    """
+    cutoff = time.time() - older_than_days * 86400 if older_than_days is not None else None
+    newest = []  # min-heap of (name, path) for the keep_last newest sketches
+    for entry in iter_sketch_entries(directory):
+        if cutoff is not None and entry.stat().st_mtime < cutoff:
+            yield entry.path
+            continue
+        if keep_last is None:
+            continue
+        item = (entry.name, entry.path)
+        if len(newest) < keep_last:
+            heapq.heappush(newest, item)
+        elif newest and item > newest[0]:
+            yield heapq.heapreplace(newest, item)[1]
+        else:
+            yield entry.path
+
+
+def cmd_prune(args):
+    if args.keep_last is None and args.older_than is None:
+        sys.exit("prune: give --keep-last and/or --older-than")
+    if args.keep_last is not None and args.keep_last < 0:
+        sys.exit("prune: --keep-last must be 0 or more")
+    paths = select_prunable(args.dir, args.keep_last, args.older_than)
+    if args.dry_run:
+        count = 0
+        for path in paths:
+            print(path)
+            count += 1
+        print(f"Would delete {count} sketches")
+        return
+    done, failed = run_batched(_delete_job, paths, args.workers)
+    print(f"Pruned: {done - failed} deleted, {failed} failed")
+
+
+def cmd_export(args):
+    def files():
+        for entry in iter_sketch_entries(args.dir):
+            yield entry.path, entry.name
+        if args.include_sessions and os.path.isdir(config.SESSION_DIR):
+            with os.scandir(config.SESSION_DIR) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith('.absl'):
+                        yield entry.path, os.path.join('sessions', entry.name)
+
+    count = 0
+    if args.archive.endswith('.zip'):
+        # Images are already compressed, so store them as-is
+        with zipfile.ZipFile(args.archive, 'w', zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for path, name in files():
+                zf.write(path, name)
+                count += 1
+    else:
+        mode = 'w:gz' if args.archive.endswith(('.tar.gz', '.tgz')) else 'w'
+        with tarfile.open(args.archive, mode) as tf:
+            for path, name in files():
+                tf.add(path, name)
+                count += 1
+    print(f"Exported {count} files to {args.archive}")
+
+
+def cmd_render_sessions(args):
+    from modules.stroke_log import export_sessions
+
+    paths = []
+    if os.path.isdir(config.SESSION_DIR):
+        with os.scandir(config.SESSION_DIR) as it:
+            paths = [e.path for e in it if e.is_file() and e.name.endswith('.absl')]
+    written = export_sessions(paths, args.out_dir, formats=args.format,
+                              scale=args.scale, workers=args.workers)
+    print(f"Rendered {len(paths)} sessions into {len(written)} files")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Bulk AirBoard sketch management")
+    parser.add_argument('--dir', default=config.SKETCH_DIR, help="Sketch directory")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('thumbnails', help="Regenerate cached thumbnails")
+    p.add_argument('--size', type=int, nargs=2, default=list(config.THUMBNAIL_SIZE),
+                   metavar=('W', 'H'))
+    p.add_argument('--force', action='store_true', help="Rebuild even if up to date")
+    p.set_defaults(func=cmd_thumbnails)
+
+    p = sub.add_parser('convert', help="Convert sketches to another format")
+    p.add_argument('--to', required=True, choices=['png', 'jpg', 'webp'])
+    p.add_argument('--quality', type=int, default=90)
+    p.add_argument('--delete-source', action='store_true')
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser('prune', help="Delete old sketches")
+    p.add_argument('--keep-last', type=int, help="Keep only the N newest sketches")
+    p.add_argument('--older-than', type=float, help="Delete sketches older than D days")
+    p.add_argument('--dry-run', action='store_true')
+    p.set_defaults(func=cmd_prune)
+
+    p = sub.add_parser('export', help="Write sketches into a .zip or .tar(.gz) archive")
+    p.add_argument('archive')
+    p.add_argument('--include-sessions', action='store_true')
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('render-sessions', help="Render recorded stroke logs")
+    p.add_argument('out_dir')
+    p.add_argument('--format', nargs='+', default=['png'], choices=['png', 'svg', 'mp4'])
+    p.add_argument('--scale', type=float, default=1.0)
+    p.set_defaults(func=cmd_render_sessions)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()